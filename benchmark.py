@@ -0,0 +1,243 @@
+from concurrent.futures import ProcessPoolExecutor
+import datetime
+import json
+import multiprocessing
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+from numba import get_num_threads
+from tqdm import tqdm
+
+from solver import DATA_DIR, get_context, simulate_one_answer
+
+STRATEGIES = ["entropy", "viable_entropy", "min_expected", "random_viable"]
+LATENCY_PERCENTILES = (50, 90, 99)
+REPORT_VERSION = 1
+
+
+#region Benchmark
+def select_answers(context, subset, seed=0):
+    """
+    Answers for a subset spec: "all", "first:N", "sample:N" (seeded) or the
+    path of a word list file.
+    """
+    if subset == "all":
+        return list(context.answer_list)
+    kind, _, value = subset.partition(":")
+    if kind == "first":
+        return list(context.answer_list[:int(value)])
+    if kind == "sample":
+        return random.Random(seed).sample(list(context.answer_list), min(int(value), len(context.answer_list)))
+
+    with open(subset, "r") as f:
+        answers = [line.strip().lower() for line in f if line.strip()]
+    unknown = [a for a in answers if a not in context.answer_to_index]
+    if unknown:
+        raise ValueError(f"{len(unknown)} words in '{subset}' are not answers, e.g. {unknown[:5]}")
+    return answers
+
+
+def peak_rss_mb():
+    # ru_maxrss is the peak of the whole process, so each run gets a process of its own;
+    # it is in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def latency_stats(seconds):
+    if not seconds:
+        return {}
+    ms = np.array(seconds) * 1000
+    stats = {f"p{p}_ms": float(np.percentile(ms, p)) for p in LATENCY_PERCENTILES}
+    stats["max_ms"] = float(ms.max())
+    stats["count"] = len(ms)
+    return stats
+
+
+def run_benchmark(context, strategy, opener, answers, subset, max_guesses=6, seed=0):
+    """
+    Play every answer with one strategy and opener, one game at a time, and
+    measure quality and speed. The score cache is cleared first so every run
+    starts cold; the opening book and first-turn cache are used as in serving.
+    """
+    random.seed(seed)
+    context.score_cache.clear()
+
+    guesses, fails = [], 0
+    timings = []
+    started = time.perf_counter()
+    for answer in tqdm(answers, desc=f"{strategy}/{opener or 'auto'}/{subset}", ncols=100):
+        turn, solved, _ = simulate_one_answer(answer, context, max_guesses=max_guesses, strategy=strategy,
+                                              first_guess=opener, timings=timings)
+        if solved:
+            guesses.append(turn)
+        else:
+            fails += 1
+            guesses.append(max_guesses + 1)
+    elapsed = time.perf_counter() - started
+
+    per_turn = {}
+    for turn, seconds in timings:
+        per_turn.setdefault(turn, []).append(seconds)
+
+    return {
+        "strategy": strategy,
+        "opener": opener,
+        "subset": subset,
+        "games": len(answers),
+        "mean_guesses": float(np.mean(guesses)),  # fails count as max_guesses+1
+        "fail_rate": fails / len(answers),
+        "seconds": elapsed,
+        "games_per_sec": len(answers) / elapsed,
+        "latency": latency_stats([seconds for _, seconds in timings]),
+        "latency_per_turn": {str(turn): latency_stats(per_turn[turn]) for turn in sorted(per_turn)},
+        "cache": context.score_cache.stats(),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _run_in_process(save_dir, strategy, opener, subset, max_guesses, seed):
+    context = get_context(save_dir)
+    context.warm_up()  # keep kernel compilation and first page faults out of the timings
+    answers = select_answers(context, subset, seed)
+    return run_benchmark(context, strategy, opener, answers, subset, max_guesses, seed)
+
+
+def run_sweep(context, strategies, openers, subsets, max_guesses=6, seed=0):
+    """
+    Benchmark every strategy x opener x subset and return the report. Each run
+    plays in a fresh process, so its peak RSS is its own.
+    """
+    spawn = multiprocessing.get_context("spawn")
+    runs = []
+    for subset in subsets:
+        for strategy in strategies:
+            for opener in openers:
+                with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as executor:
+                    runs.append(executor.submit(_run_in_process, context.save_dir or DATA_DIR, strategy, opener,
+                                                subset, max_guesses, seed).result())
+
+    return {
+        "report_version": REPORT_VERSION,
+        "created": datetime.datetime.now().isoformat(),
+        "commit": _git_commit(),
+        "vocabulary": context.version,
+        "guesses": len(context.word_list),
+        "answers": len(context.answer_list),
+        "max_guesses": max_guesses,
+        "seed": seed,
+        "python": platform.python_version(),
+        "numba_threads": get_num_threads(),
+        "runs": runs,
+    }
+#endregion
+
+
+#region Compare
+def _run_key(run):
+    return run["strategy"], run["opener"], run["subset"]
+
+
+def compare_reports(report, baseline, quality_tolerance=0.0, perf_tolerance=0.2):
+    """
+    Regressions of `report` against `baseline`, as readable strings. Quality
+    regresses when mean guesses or the fail rate grow by more than
+    `quality_tolerance`; speed when games/sec drop or p90 latency grows by more
+    than the `perf_tolerance` fraction.
+    """
+    regressions = []
+    if report["vocabulary"] != baseline["vocabulary"]:
+        regressions.append("vocabulary differs from the baseline, results are not comparable")
+        return regressions
+
+    baseline_runs = {_run_key(run): run for run in baseline["runs"]}
+    for run in report["runs"]:
+        base = baseline_runs.get(_run_key(run))
+        if base is None:
+            continue
+        name = "/".join(str(part) for part in _run_key(run))
+
+        for metric in ("mean_guesses", "fail_rate"):
+            if run[metric] > base[metric] + quality_tolerance:
+                regressions.append(f"{name}: {metric} {base[metric]:.4f} -> {run[metric]:.4f}")
+        if run["games_per_sec"] < base["games_per_sec"] * (1 - perf_tolerance):
+            regressions.append(f"{name}: games/sec {base['games_per_sec']:.1f} -> {run['games_per_sec']:.1f}")
+        p90, base_p90 = run["latency"].get("p90_ms"), base["latency"].get("p90_ms")
+        if p90 is not None and base_p90 is not None and p90 > base_p90 * (1 + perf_tolerance):
+            regressions.append(f"{name}: p90 latency {base_p90:.2f}ms -> {p90:.2f}ms")
+    return regressions
+
+
+def print_report(report, baseline=None):
+    baseline_runs = {_run_key(run): run for run in baseline["runs"]} if baseline else {}
+    print(f"\n{'strategy':<16}{'opener':<8}{'subset':<14}{'games':>7}{'mean':>8}{'fails':>8}"
+          f"{'games/s':>10}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'rss MB':>9}")
+    for run in report["runs"]:
+        latency = run["latency"]
+        print(f"{run['strategy']:<16}{str(run['opener'] or '-'):<8}{run['subset']:<14}{run['games']:>7}"
+              f"{run['mean_guesses']:>8.4f}{run['fail_rate']:>8.2%}{run['games_per_sec']:>10.1f}"
+              f"{latency.get('p50_ms', 0):>9.2f}{latency.get('p90_ms', 0):>9.2f}{latency.get('p99_ms', 0):>9.2f}"
+              f"{run['peak_rss_mb']:>9.0f}")
+        base = baseline_runs.get(_run_key(run))
+        if base is not None:
+            print(f"{'  baseline':<38}{base['games']:>7}{base['mean_guesses']:>8.4f}{base['fail_rate']:>8.2%}"
+                  f"{base['games_per_sec']:>10.1f}")
+#endregion
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark strategies x openers x answer subsets.")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES), help="comma separated strategies")
+    parser.add_argument("--openers", default="auto",
+                        help="comma separated first guesses, 'auto' lets the strategy choose")
+    parser.add_argument("--subsets", default="all",
+                        help="comma separated answer subsets: all, first:N, sample:N or a word list path")
+    parser.add_argument("--max-guesses", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark.json", help="where to write the report")
+    parser.add_argument("--baseline", help="report to compare against; exits with status 1 on a regression")
+    parser.add_argument("--quality-tolerance", type=float, default=0.0)
+    parser.add_argument("--perf-tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    context = get_context()
+    strategies = [s.strip() for s in args.strategies.split(",")]
+    openers = [None if o.strip() == "auto" else o.strip().lower() for o in args.openers.split(",")]
+    for opener in openers:
+        if opener is not None and opener not in context.word_to_index:
+            sys.exit(f"'{opener}' is not a valid guess")
+
+    report = run_sweep(context, strategies, openers, [s.strip() for s in args.subsets.split(",")],
+                       max_guesses=args.max_guesses, seed=args.seed)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"\nSaved report to '{args.output}'")
+
+    if baseline is not None:
+        regressions = compare_reports(report, baseline, args.quality_tolerance, args.perf_tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.")
@@ -0,0 +1,327 @@
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+import solver
+from solver import DATA_DIR, GameState, SharedContext, best_guesses_for_state, default_workers, get_context, init_worker
+
+DECISION_TREE_DIR = "decision_trees"
+
+
+#region Search
+class TreeNode:
+    """One position of a strategy tree: the guess to play and the subtree for every non-winning feedback code."""
+
+    __slots__ = ("size", "cost", "guess", "children")
+
+    def __init__(self, size, cost, guess, children):
+        self.size = size
+        self.cost = cost  # total guesses summed over the answers of this position, a fail counts one extra
+        self.guess = guess  # -1 when the answers were not found within the guess limit
+        self.children = children
+
+
+def _lower_bound(size, guesses_left):
+    """Fewest total guesses any strategy needs for `size` answers."""
+    if guesses_left <= 0:
+        return size
+    return 2 * size - 1
+
+
+class DecisionTreeSearch:
+    """
+    Depth-limited search for the strategy tree with the fewest expected guesses.
+
+    At every position the `breadth` best guesses by entropy plus the `breadth`
+    best viable answers are tried, and the best of them is exact for that
+    candidate set. Solved positions are memoised by remaining set and turn, and
+    a candidate is abandoned as soon as its partial cost plus lower bounds for
+    its unsolved buckets reaches the best cost found so far.
+    """
+
+    def __init__(self, context, max_guesses=6, breadth=10):
+        self.context = context
+        self.max_guesses = max_guesses
+        self.breadth = breadth
+        self.memo = {}
+        self.nodes_per_depth = Counter()
+        self.pruned_per_depth = Counter()
+        self.seconds_per_depth = defaultdict(float)
+
+    def candidates(self, remaining):
+        scores = best_guesses_for_state(GameState(self.context, remaining))
+        best = scores.ranked("entropy", self.breadth)
+        viable = scores.ranked("entropy", self.breadth, scores.viable_guesses())
+        picked = np.unique(np.concatenate([best, viable]))
+        return picked[np.argsort(-scores.entropies[picked], kind="stable")]
+
+    def split(self, g_idx, remaining):
+        codes = self.context.feedback_codes(g_idx, remaining)
+        order = np.argsort(codes, kind="stable")
+        codes = codes[order]
+        starts = np.flatnonzero(np.diff(codes, prepend=-1))
+        ends = np.append(starts[1:], len(codes))
+        return [(int(codes[s]), remaining[order[s:e]]) for s, e in zip(starts, ends)]
+
+    def solve(self, remaining, turn=1):
+        key = f"{self.context.score_cache.key(remaining)}:{turn}"
+        node = self.memo.get(key)
+        if node is not None:
+            return node
+
+        started = time.perf_counter()
+        child_seconds = 0.0
+        n = len(remaining)
+        guesses_left = self.max_guesses - turn + 1
+        self.nodes_per_depth[turn] += 1
+
+        node = None
+        if guesses_left <= 0:
+            node = TreeNode(n, n, -1, {})
+        elif n == 1 and self.context.answer_guess_indices[remaining[0]] >= 0:
+            node = TreeNode(1, 1, int(self.context.answer_guess_indices[remaining[0]]), {})
+        else:
+            for g_idx in self.candidates(remaining):
+                win_code = 3 ** len(self.context.word_list[g_idx]) - 1
+                buckets = [(code, bucket) for code, bucket in self.split(g_idx, remaining) if code != win_code]
+                if len(buckets) == 1 and len(buckets[0][1]) == n:
+                    continue
+
+                cost = n
+                bound = sum(_lower_bound(len(bucket), guesses_left - 1) for _, bucket in buckets)
+                children = {}
+                for code, bucket in sorted(buckets, key=lambda b: -len(b[1])):
+                    if node is not None and cost + bound >= node.cost:
+                        break
+                    bound -= _lower_bound(len(bucket), guesses_left - 1)
+                    child_started = time.perf_counter()
+                    child = self.solve(bucket, turn + 1)
+                    child_seconds += time.perf_counter() - child_started
+                    cost += child.cost
+                    children[code] = child
+                else:
+                    if node is None or cost < node.cost:
+                        node = TreeNode(n, cost, int(g_idx), children)
+                    continue
+                self.pruned_per_depth[turn] += 1
+
+        if node is None:
+            node = TreeNode(n, n * (guesses_left + 1), -1, {})
+
+        self.seconds_per_depth[turn] += time.perf_counter() - started - child_seconds
+        self.memo[key] = node
+        return node
+
+    def stats(self):
+        return {
+            turn: {
+                "nodes": self.nodes_per_depth[turn],
+                "pruned": self.pruned_per_depth[turn],
+                "seconds": self.seconds_per_depth[turn],
+            }
+            for turn in sorted(self.nodes_per_depth)
+        }
+
+
+def _solve_branch(args):
+    remaining, max_guesses, breadth = args
+    search = DecisionTreeSearch(solver._global_data["context"], max_guesses=max_guesses, breadth=breadth)
+    node = search.solve(remaining, turn=2)
+    return node, search.stats()
+
+
+def _merge_stats(total, stats):
+    for turn, values in stats.items():
+        merged = total.setdefault(turn, {"nodes": 0, "pruned": 0, "seconds": 0.0})
+        for name, value in values.items():
+            merged[name] += value
+
+
+def build_decision_tree(context, opener, max_guesses=6, breadth=10, workers=None, save_dir=None):
+    """
+    Build and save the strategy tree for `opener`. The opener's feedback buckets
+    are solved in parallel, one task per bucket.
+    """
+    started = time.perf_counter()
+    search = DecisionTreeSearch(context, max_guesses=max_guesses, breadth=breadth)
+    g_idx = context.word_to_index[opener]
+    remaining = np.arange(len(context.answer_list), dtype=np.int32)
+    win_code = 3 ** len(opener) - 1
+    buckets = [(code, bucket) for code, bucket in search.split(g_idx, remaining) if code != win_code]
+    buckets.sort(key=lambda b: -len(b[1]))
+
+    if workers is None:
+        workers = default_workers()
+
+    stats = {}
+    children = {}
+    if workers > 1:
+        with SharedContext(context) as shared, ProcessPoolExecutor(
+                max_workers=workers, initializer=init_worker, initargs=(shared.spec,)) as executor:
+            tasks = [(bucket, max_guesses, breadth) for _, bucket in buckets]
+            for (code, _), (child, child_stats) in zip(buckets, executor.map(_solve_branch, tasks)):
+                children[code] = child
+                _merge_stats(stats, child_stats)
+    else:
+        for code, bucket in buckets:
+            children[code] = search.solve(bucket, turn=2)
+        _merge_stats(stats, search.stats())
+
+    n = len(remaining)
+    root = TreeNode(n, n + sum(child.cost for child in children.values()), g_idx, children)
+    elapsed = time.perf_counter() - started
+
+    print(f"Decision tree for '{opener}': {root.cost / n:.4f} expected guesses, "
+          f"{count_failures(root)} unsolved answers, {elapsed:.1f}s")
+    for turn, values in sorted(stats.items()):
+        print(f"  turn {turn}: {values['nodes']} nodes, {values['pruned']} pruned, {values['seconds']:.2f}s")
+
+    tree = DecisionTree.from_root(context, opener, root)
+    tree.save(f"{save_dir or context.save_dir or DATA_DIR}/{DECISION_TREE_DIR}/{opener}.npz")
+    return tree, stats
+
+
+def count_failures(node):
+    if node.guess < 0:
+        return node.size
+    return sum(count_failures(child) for child in node.children.values())
+#endregion
+
+
+#region Lookup
+class DecisionTree:
+    """
+    A strategy tree flattened into arrays: node i plays guesses[i], and its
+    children are child_nodes[child_offsets[i]:child_offsets[i + 1]] keyed by
+    child_codes. Lookups walk the history through a dict, one step per guess.
+    """
+
+    def __init__(self, context, opener, guesses, sizes, costs, child_offsets, child_codes, child_nodes):
+        self.context = context
+        self.opener = opener
+        self.guesses = guesses
+        self.sizes = sizes
+        self.costs = costs
+        self.child_offsets = child_offsets
+        self.child_codes = child_codes
+        self.child_nodes = child_nodes
+        self.children = {}
+        for node in range(len(guesses)):
+            for pos in range(child_offsets[node], child_offsets[node + 1]):
+                self.children[(node, int(child_codes[pos]))] = int(child_nodes[pos])
+
+    @classmethod
+    def from_root(cls, context, opener, root):
+        guesses, sizes, costs, offsets, codes, nodes = [], [], [], [0], [], []
+        numbered = {}
+        order = [root]
+        numbered[id(root)] = 0
+        for node in order:
+            for child in node.children.values():
+                if id(child) not in numbered:
+                    numbered[id(child)] = len(order)
+                    order.append(child)
+
+        for node in order:
+            guesses.append(node.guess)
+            sizes.append(node.size)
+            costs.append(node.cost)
+            for code, child in sorted(node.children.items()):
+                codes.append(code)
+                nodes.append(numbered[id(child)])
+            offsets.append(len(codes))
+
+        return cls(
+            context, opener,
+            np.array(guesses, dtype=np.int32), np.array(sizes, dtype=np.int32), np.array(costs, dtype=np.int64),
+            np.array(offsets, dtype=np.int32), np.array(codes, dtype=np.int16), np.array(nodes, dtype=np.int32),
+        )
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez_compressed(
+            path,
+            version=np.array(self.context.version),
+            opener=np.array(self.opener),
+            guesses=self.guesses,
+            sizes=self.sizes,
+            costs=self.costs,
+            child_offsets=self.child_offsets,
+            child_codes=self.child_codes,
+            child_nodes=self.child_nodes,
+        )
+        print(f"Saved decision tree with {len(self.guesses)} nodes to '{path}'")
+
+    @classmethod
+    def load(cls, path, context):
+        data = np.load(path, allow_pickle=False)
+        if str(data["version"]) != context.version:
+            print(f"Ignoring decision tree '{path}': built for a different vocabulary")
+            return None
+        return cls(
+            context, str(data["opener"]), data["guesses"], data["sizes"], data["costs"],
+            data["child_offsets"], data["child_codes"], data["child_nodes"],
+        )
+
+    @property
+    def expected_guesses(self):
+        return float(self.costs[0] / self.sizes[0])
+
+    def node_for_history(self, history):
+        """Tree node reached by the history, or None if the history left the tree."""
+        node = 0
+        for guess, fb_str in history:
+            if self.context.word_to_index.get(guess) != self.guesses[node]:
+                return None
+            node = self.children.get((node, solver.encode_feedback(fb_str)))
+            if node is None:
+                return None
+        return node
+
+    def next_guess(self, history):
+        node = self.node_for_history(history)
+        if node is None or self.guesses[node] < 0:
+            return None
+        return {
+            "guess": self.context.word_list[self.guesses[node]],
+            "remaining": int(self.sizes[node]),
+            "expected_guesses": float(self.costs[node] / self.sizes[node]),
+        }
+
+
+_trees = {}
+
+def load_decision_trees(context):
+    """All saved trees for the context's vocabulary, keyed by opener (loaded once per process)."""
+    if context.version not in _trees:
+        trees = {}
+        for path in sorted(glob.glob(f"{context.save_dir or DATA_DIR}/{DECISION_TREE_DIR}/*.npz")):
+            tree = DecisionTree.load(path, context)
+            if tree is not None:
+                trees[tree.opener] = tree
+        _trees[context.version] = trees
+    return _trees[context.version]
+#endregion
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build an exact strategy tree for an opener.")
+    parser.add_argument("opener")
+    parser.add_argument("--breadth", type=int, default=10, help="guesses tried per position")
+    parser.add_argument("--max-guesses", type=int, default=6)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    multiprocessing.set_start_method("spawn", force=True)
+    context = get_context()
+    if args.opener not in context.word_to_index:
+        sys.exit(f"'{args.opener}' is not a valid guess")
+    build_decision_tree(context, args.opener, max_guesses=args.max_guesses, breadth=args.breadth, workers=args.workers)
@@ -1,12 +1,69 @@
+import bootstrap  # first, so that importing everything below is timed
 import random
 import json
+import time
 
-from solver import filter_words, get_and_decode_feedback, load_distribution_data, load_distribution_from_csv, load_options_sections, load_feedback_data, load_summary, next_best_guesses
-from flask import Flask, render_template, request, jsonify, session
+from solver import STARTUP, GameState, MultiGameState, analyze_histories, get_context, list_simulation_runs, load_distribution_data, load_simulation, lookahead_options, multi_board_options, options_sections, warm_up
+from solver import full_options as solver_full_options
+from decision_tree import load_decision_trees
+from serving import Overloaded, SolverExecutor
+from sessions import GameSession, MemorySessionStore
+from flask import Flask, Response, g, render_template, request, jsonify, session, stream_with_context
+import metrics
+
+STARTUP["import"] = time.perf_counter() - bootstrap.IMPORTS_STARTED
 
 app = Flask(__name__)
 app.secret_key = "supersecretkey123"
 
+# Games live on the server; the cookie only carries the game id. Swap in a
+# sessions.KeyValueSessionStore to share games between processes.
+game_store = MemorySessionStore()
+
+# Scoring runs on a bounded executor so that identical concurrent positions
+# are computed once and bursts get a 503 instead of piling up.
+solver_executor = SolverExecutor()
+ANALYZE_MAX_WAIT = 30  # seconds one /analyze request may spend waiting for room on the executor
+
+@app.errorhandler(Overloaded)
+def overloaded(error):
+    response = jsonify({"error": "Solver is busy, try again shortly", "detail": str(error)})
+    response.status_code = 503
+    response.headers["Retry-After"] = "1"
+    return response
+
+@app.before_request
+def start_timer():
+    if metrics.enabled():
+        g.started = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    started = g.pop("started", None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        metrics.observe("wordle_http_request_seconds", time.perf_counter() - started,
+                        route=route, method=request.method, status=response.status_code)
+    return response
+
+def score_cache_samples():
+    stats = get_context().score_cache.stats()
+    return [("wordle_score_cache_entries", "gauge", {}, stats["entries"])] + [
+        (f"wordle_score_cache_{kind}_total", "counter", {}, stats[kind]) for kind in ("hits", "spill_hits", "misses")
+    ]
+
+metrics.register_collector(score_cache_samples)
+metrics.register_collector(lambda: [("wordle_solver_pending", "gauge", {}, solver_executor.pending())])
+metrics.register_collector(lambda: [("wordle_startup_seconds", "gauge", {"stage": stage}, seconds)
+                                    for stage, seconds in STARTUP.items()])
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Timings and counters in the Prometheus text format (turn off with WORDLE_METRICS=0)."""
+    if not metrics.enabled():
+        return "Metrics are disabled", 404
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -15,6 +72,10 @@ def index():
 def play():
     return render_template('play.html')
 
+def current_game():
+    game_id = session.get('game_id')
+    return game_store.get(game_id) if game_id else None
+
 @app.route('/start_game', methods=['POST'])
 def start_game():
     """
@@ -27,77 +88,95 @@ def start_game():
     manual_feedback = data.get("manual_feedback", False)
     answer = data.get("answer", None)
 
-    words, feedback_matrix, word_to_index = load_feedback_data()
+    context = get_context()
+
+    if session.get('game_id'):
+        game_store.delete(session['game_id'])
 
     if manual_feedback:
         # No answer mode
-        session['answer'] = None
-        session['manual_feedback'] = True
-        session['history'] = []
-        return jsonify({"status": "ok", "answer_length": 5, "manual_feedback": True})
+        game = GameSession(context, manual_feedback=True)
+        game_store.save(game)
+        session['game_id'] = game.id
+        return jsonify({"status": "ok", "answer_length": context.word_length, "manual_feedback": True})
 
     if answer:
-        if answer not in words:
+        if answer not in context.answer_to_index:
             return jsonify({"error": "Invalid answer word"}), 400
-        session['answer'] = answer
     else:
         # default random answer
-        session['answer'] = random.choice(words)
+        answer = random.choice(context.answer_list)
 
-    session['manual_feedback'] = False
-    session['history'] = []
-    return jsonify({"status": "ok", "answer_length": len(session['answer']), "manual_feedback": False})
+    game = GameSession(context, answer=context.answer_to_index[answer])
+    game_store.save(game)
+    session['game_id'] = game.id
+    return jsonify({"status": "ok", "answer_length": len(answer), "manual_feedback": False})
 
 
 @app.route('/guess', methods=['POST'])
 def guess():
     data = request.json
     guess_word = data.get('guess', '').lower()
-    answer = session.get('answer', None)
-    manual_feedback = session.get('manual_feedback', False)
-
-    if 'history' not in session:
-        session['history'] = []
+    game = current_game()
+    if game is None:
+        return jsonify({"error": "Game not started"}), 400
 
-    if manual_feedback:
+    context = get_context()
+    word_to_index = context.word_to_index
+    if game.manual_feedback:
         history = data.get('history', None)
         if not history or not all('guess' in h and 'feedback' in h for h in history):
             return jsonify({"error": "Invalid history for manual mode"}), 400
 
         for h in history:
-            if len(h['feedback']) != 5 or any(c not in "BYG" for c in h['feedback']):
+            if len(h['feedback']) != context.word_length or any(c not in "BYG" for c in h['feedback']):
                 return jsonify({"error": "Invalid feedback format in history"}), 400
-    else:
-        if not answer:
-            return jsonify({"error": "Game not started"}), 400
+            # words outside the vocabulary are fine here, the game is played elsewhere
+            if len(h['guess']) != context.word_length or not h['guess'].isalpha() or not h['guess'].isascii():
+                return jsonify({"error": "Invalid word", "win": False, "done": False}), 400
 
-        words, _, _ = load_feedback_data()
-        if guess_word not in words:
+        game.sync([(h['guess'].lower(), h['feedback']) for h in history])
+    else:
+        if guess_word not in word_to_index:
             return jsonify({"error": "Invalid word", "win": False, "done": False}), 400
 
-        feedback = get_and_decode_feedback(guess_word, answer)
-        history = session.get('history', [])
-        history.append({"guess": guess_word, "feedback": feedback})
+        game.guess(guess_word)
 
-    session['history'] = history
+    game_store.save(game)
+    history = game.history
 
-    win = history[-1]['feedback'] == "GGGGG"
+    win = history[-1]['feedback'] == "G" * context.word_length
     done = len(history) >= 6 or win
 
     return jsonify({
         "history": history,
         "win": win,
         "done": done,
-        "manual_feedback": manual_feedback
+        "manual_feedback": game.manual_feedback
     })
 
+def request_scores():
+    """
+    Scores of the position asked about: an explicit `history` query parameter
+    is replayed from scratch, otherwise the current game's cached position is used.
+    """
+    if 'history' in request.args or current_game() is None:
+        history = json.loads(request.args.get('history', '[]'))
+        history = [(str.lower(hist["guess"]), hist["feedback"]) for hist in history]
+        return solver_executor.scores(GameState.from_history(get_context(), history))
+
+    game = current_game()
+    scores = game.scores(solver_executor)
+    game_store.save(game)
+    return scores
+
 @app.route('/best_options')
 def best_options():
-    history = request.args.get('history', '[]')
-    history = json.loads(history)
-    history = [(str.lower(hist["guess"]), hist["feedback"]) for hist in history]
-
-    data = load_options_sections(history)
+    """The position's best guesses; `?lookahead=1` adds two-turn scores of the top ones (see solver.LOOKAHEAD_BUDGET)."""
+    scores = request_scores()
+    data = options_sections(scores)
+    if request.args.get('lookahead', 0, type=int):
+        data.update(lookahead_options(solver_executor.lookahead(scores)))
     
     for key in ["viable_answers", "top_entropy", "bot_entropy", "top_remaining", "bot_remaining"]:
         for item in data.get(key, []):
@@ -109,35 +188,95 @@ def best_options():
     # Total remaining words
     data["total_remaining"] = data.get("remaining_count", len(data.get("viable_answers", [])))
 
-    return jsonify(data)
+    with metrics.span("serialize"):
+        return jsonify(data)
 
 @app.route('/full_options')
 def full_options():
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', None, type=int)
+
+    data = solver_full_options(request_scores(), offset=max(offset, 0), limit=limit)
+    with metrics.span("serialize"):
+        return jsonify(data)
+
+@app.route('/tree_guess')
+def tree_guess():
+    """Next guess from a precomputed decision tree for the history's opener."""
     history = request.args.get('history', '[]')
     history = json.loads(history)
     history = [(str.lower(hist["guess"]), hist["feedback"]) for hist in history]
 
-    words, feedback_matrix, word_to_index = load_feedback_data()
-    data = next_best_guesses(words, feedback_matrix, word_to_index, history)
-
-    if data is None:
-        return jsonify({"viable_answers": [], "viable_guesses": []})
-
-    remaining, results = data
-    viable_answers = [{"word": w, "entropy": float(e), "expected": float(er)} for w, e, er in results if w in remaining]
-    viable_guesses = [{"word": w, "entropy": float(e), "expected": float(er)} for w, e, er in results]
-    sorted_answers = sorted(viable_answers, key=lambda x: x["entropy"], reverse=True)
-    sorted_guesses = sorted(viable_guesses, key=lambda x: x["entropy"], reverse=True)
-
-    for idx, item in enumerate(sorted_answers):
-        item["index"] = idx
-    for idx, item in enumerate(sorted_guesses):
-        item["index"] = idx
-
-    return jsonify({
-        "viable_answers": sorted_answers,
-        "viable_guesses": sorted_guesses
-    })
+    trees = load_decision_trees(get_context())
+    if not history:
+        if not trees:
+            return jsonify({"error": "No decision tree available"}), 404
+        tree = min(trees.values(), key=lambda t: t.expected_guesses)
+        return jsonify({"guess": tree.opener, "expected_guesses": tree.expected_guesses, "remaining": int(tree.sizes[0])})
+
+    tree = trees.get(history[0][0])
+    move = tree.next_guess(history) if tree is not None else None
+    if move is None:
+        return jsonify({"error": "History is not covered by a decision tree"}), 404
+    return jsonify(move)
+
+@app.route('/analyze', methods=['POST'])
+def analyze():
+    """
+    Grade many games in one call. The body is NDJSON, one game per line: a
+    list of {"guess", "feedback"} objects or [guess, feedback] pairs, or
+    {"id": ..., "history": [...]}. The response streams one NDJSON line per
+    game, in order, with per-turn entropy, best available entropy and
+    remaining counts (see solver.analyze_histories).
+    """
+    ids = []
+    waited = 0.0
+
+    def move(h):
+        guess, feedback = (h.get("guess"), h.get("feedback")) if isinstance(h, dict) else h
+        if not isinstance(guess, str) or not isinstance(feedback, str):
+            raise TypeError("a move is a guess and a feedback string")
+        return guess, feedback
+
+    def histories():
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                game = json.loads(line)
+            except ValueError:
+                game = None
+            game_id = None
+            if isinstance(game, dict):
+                game_id, game = game.get("id"), game.get("history")
+            ids.append(game_id)
+            try:
+                game = [move(h) for h in game] if isinstance(game, list) else None
+            except (TypeError, ValueError):
+                game = None
+            yield game  # None is reported as an invalid game
+
+    def score(state):
+        # a batch job waits for room on the executor instead of failing mid-stream,
+        # up to ANALYZE_MAX_WAIT in all; after that, games needing a busy position get an error row
+        nonlocal waited
+        while True:
+            try:
+                return solver_executor.scores(state)
+            except Overloaded:
+                if waited >= ANALYZE_MAX_WAIT:
+                    return None
+                time.sleep(0.05)
+                waited += 0.05
+
+    def generate():
+        for row in analyze_histories(histories(), get_context(), score=score):
+            if ids[row["game"]] is not None:
+                row["id"] = ids[row["game"]]
+            yield json.dumps(row) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
 
 # Distribution page
 @app.route('/distribution')
@@ -146,45 +285,102 @@ def distribution_page():
 
 @app.route('/distribution_data', methods=['POST'])
 def distribution_data():
+    """
+    Feedback buckets of `guess`, or of every word in `guesses` at once for
+    side-by-side comparison, after `history`.
+    """
     data = request.json
-    guess = data.get('guess', '').lower()
-    history = data.get('history', [])
+    if "guesses" in data:
+        guess = [str.lower(g) for g in data["guesses"]]
+    else:
+        guess = data.get('guess', '').lower()
+    history = [(str.lower(hist["guess"]), hist["feedback"]) for hist in data.get('history', [])]
+
+    word_to_index = get_context().word_to_index
+    unknown = [g for g in ([guess] if isinstance(guess, str) else guess) if g not in word_to_index]
+    if unknown:
+        return jsonify({"error": f"Invalid word: {', '.join(unknown)}"}), 400
 
     results = load_distribution_data(guess, history)
 
-    return jsonify(results)
+    with metrics.span("serialize"):
+        return jsonify(results)
+
+@app.route('/multi_best_options', methods=['POST'])
+def multi_best_options():
+    """
+    Best guesses for a multi-board game (Quordle, Octordle). JSON body: `boards`
+    (default 4, or taken from the history) and `history`, a list of
+    {"guess", "feedback": [feedback of each board]} objects.
+    """
+    data = request.json or {}
+    context = get_context()
+    moves = data.get("history", [])
+    if not isinstance(moves, list) or not all(isinstance(h, dict) for h in moves):
+        return jsonify({"error": "history must be a list of {\"guess\", \"feedback\"} objects"}), 400
+
+    history = []
+    for h in moves:
+        word, feedbacks = h.get("guess", ""), h.get("feedback", [])
+        if not isinstance(word, str) or len(word) != context.word_length or not word.isalpha() or not word.isascii():
+            return jsonify({"error": f"Invalid word: {word}"}), 400
+        if not isinstance(feedbacks, list) or not feedbacks or any(
+                not isinstance(fb, str) or len(fb) != context.word_length or any(c not in "BYG" for c in fb)
+                for fb in feedbacks):
+            return jsonify({"error": f"Invalid feedback for '{word}'"}), 400
+        history.append((word.lower(), feedbacks))
+
+    boards = data.get("boards")
+    if boards is not None and (isinstance(boards, bool) or not isinstance(boards, int) or not 1 <= boards <= 16):
+        return jsonify({"error": "boards must be between 1 and 16"}), 400
+    try:
+        state = MultiGameState.from_history(context, history, boards)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    results = multi_board_options(state, solver_executor.board_scores(state), k=request.args.get("k", 10, type=int))
+    with metrics.span("serialize"):
+        return jsonify(results)
 
 @app.route("/simulation_dashboard")
 def simulation_dashboard():
-    strategy = "entropy"
-    summary = load_summary(strategy)
-    distribution = load_distribution_from_csv(strategy)
-
-    #quick fix
-    summary["start_ts"] = summary["start_ts"].isoformat()
-    distribution = {str(k): v for k, v in summary["rounds_distribution"].items()}
-
-
-    if not summary or not distribution:
+    runs = list_simulation_runs()
+    if not runs:
         return "No simulation data found. Please run a simulation first."
 
     return render_template("simulation_dashboard.html",
-                           summary=summary,
-                           distribution=distribution,
-                           strategy=strategy)
+                           runs=[{"name": run.name, "summary": run.summary,
+                                  "distribution": {str(k): v for k, v in run.distribution.items()}}
+                                 for run in runs])
 
 
 @app.route("/data/<strategy>")
 def data(strategy):
-    summary = load_summary(strategy)
-    distribution = load_distribution_from_csv(strategy)
-    if not summary or not distribution:
+    first_guess = request.args.get("first_guess", None)
+    if first_guess is not None:
+        first_guess = first_guess.lower() in ("1", "true", "yes")
+
+    run = load_simulation(strategy, first_guess)
+    if run is None:
         return jsonify({"error": "No data found"}), 404
 
     return jsonify({
-        "summary": summary,
-        "distribution": distribution
+        "summary": run.summary,
+        "distribution": run.distribution
     })
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the solver web app.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--production", action="store_true",
+                        help="threaded server without the debugger and reloader")
+    args = parser.parse_args()
+
+    warm_up()
+    if args.production:
+        app.run(host=args.host, port=args.port, threaded=True, debug=False)
+    else:
+        app.run(host=args.host, port=args.port, debug=True)
@@ -0,0 +1,197 @@
+import bisect
+from functools import wraps
+import os
+import threading
+import time
+
+METRICS_ENV = "WORDLE_METRICS"  # set to 0 to turn collection off
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000)
+
+_enabled = os.environ.get(METRICS_ENV, "1") != "0"
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_descriptions = {
+    "wordle_stage_seconds": ("histogram", "Time spent in each solver stage."),
+    "wordle_http_request_seconds": ("histogram", "Time to handle a request, by route."),
+    "wordle_scores_total": ("counter", "Positions scored, by where the scores came from."),
+    "wordle_remaining_answers": ("histogram", "Remaining answers of each scored position."),
+    "wordle_score_cache_entries": ("gauge", "Positions held in the score cache."),
+    "wordle_score_cache_hits_total": ("counter", "Score cache lookups answered from memory."),
+    "wordle_score_cache_spill_hits_total": ("counter", "Score cache lookups answered from the spill directory."),
+    "wordle_score_cache_misses_total": ("counter", "Score cache lookups that found nothing."),
+    "wordle_solver_requests_total": ("counter", "Positions sent to the solver executor, by outcome."),
+    "wordle_solver_pending": ("gauge", "Distinct positions queued or being scored."),
+    "wordle_startup_seconds": ("gauge", "Time this process spent in each startup stage."),
+}
+_collectors = []
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def describe(name, kind, text):
+    _descriptions[name] = (kind, text)
+
+
+def register_collector(collect):
+    """`collect()` is called on every render and returns (name, kind, labels, value) samples, e.g. cache stats."""
+    _collectors.append(collect)
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+
+#region Spans
+class _Span:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe("wordle_stage_seconds", time.perf_counter() - self.started, stage=self.stage)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(stage):
+    """Context manager timing a solver stage; a shared no-op when metrics are off."""
+    return _Span(stage) if _enabled else _NO_SPAN
+
+
+def timed(stage):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+#endregion
+
+
+#region Export
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted(
+            (key, (h.buckets, list(h.counts), h.sum, h.count)) for key, h in _histograms.items()
+        )
+
+    samples = {}
+    for (name, labels), value in counters:
+        samples.setdefault(name, ("counter", []))[1].append((labels, value))
+    for collect in _collectors:
+        for name, kind, labels, value in collect():
+            samples.setdefault(name, (kind, []))[1].append((tuple(sorted(labels.items())), value))
+
+    lines = []
+    written = set()
+
+    def header(name, kind):
+        if name not in written:
+            written.add(name)
+            text = _descriptions.get(name, (kind, ""))[1]
+            if text:
+                lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for name, (kind, values) in sorted(samples.items()):
+        header(name, kind)
+        for labels, value in values:
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    for (name, labels), (buckets, counts, total, count) in histograms:
+        header(name, "histogram")
+        cumulative = 0
+        for bound, bucket_count in zip(list(buckets) + [float("inf")], counts):
+            cumulative += bucket_count
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', _format_value(bound))])} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+    return "\n".join(lines) + "\n"
+#endregion
@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+
+import numba
+
+import metrics
+from solver import (LOOKAHEAD_BUDGET, LOOKAHEAD_CANDIDATES, best_board_guesses, best_guesses_for_state,
+                    lookahead_key, lookahead_scores)
+
+# The scoring kernel already spreads one position over every core, and
+# Numba's default threading layer cannot run two parallel kernels at once,
+# so positions are scored one at a time unless a tbb/omp layer is installed.
+SOLVER_WORKERS = 1
+SOLVER_MAX_PENDING = 32  # distinct positions queued or running before new ones are refused
+
+# With the TBB layer, a first parallel kernel launched off the main thread
+# deadlocks, and kernels run on the executor thread hang the process on exit.
+# Prefer the other layers unless NUMBA_THREADING_LAYER(_PRIORITY) says otherwise.
+if not os.environ.get("NUMBA_THREADING_LAYER") and not os.environ.get("NUMBA_THREADING_LAYER_PRIORITY"):
+    numba.config.THREADING_LAYER_PRIORITY = ["omp", "workqueue", "tbb"]
+
+
+class Overloaded(Exception):
+    """Raised instead of queueing when the solver executor is full."""
+
+
+class SolverExecutor:
+    """
+    Scores positions on a bounded thread pool, so parallel kernels never run
+    on request threads. Concurrent requests for the same position share one
+    computation, positions already in the score cache are answered on the
+    calling thread, and once `max_pending` distinct positions are waiting new
+    ones raise Overloaded.
+    """
+
+    def __init__(self, workers=SOLVER_WORKERS, max_pending=SOLVER_MAX_PENDING):
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="solver")
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def scores(self, state):
+        """best_guesses_for_state(state), computed at most once across concurrent callers."""
+        if len(state) == 0:
+            return None
+        cache = state.context.score_cache
+        key = cache.key(state.remaining)
+        if key in cache:
+            return best_guesses_for_state(state)
+        return self.submit(key, best_guesses_for_state, state.clone())
+
+    def board_scores(self, state):
+        """best_board_guesses(state) for a MultiGameState, computed at most once across concurrent callers."""
+        if state.done:
+            return None
+        return self.submit(state.key(), best_board_guesses, state)
+
+    def lookahead(self, scores, budget=LOOKAHEAD_BUDGET):
+        """
+        lookahead_scores(scores), limited to `budget` seconds once it starts
+        and computed at most once across concurrent callers.
+        """
+        if scores is None:
+            return None
+        _, key = lookahead_key(scores)
+        if key in scores.context.lookahead_cache:
+            return lookahead_scores(scores)
+        return self.submit(f"lookahead:{key}", lookahead_scores, scores, None, LOOKAHEAD_CANDIDATES, budget)
+
+    def submit(self, key, fn, *args):
+        """fn(*args) on the pool; callers passing the same key while it runs share its result."""
+        with self._lock:
+            future = self._pending.get(key)
+            submitted = future is None
+            if not submitted:
+                metrics.inc("wordle_solver_requests_total", outcome="coalesced")
+            else:
+                if len(self._pending) >= self.max_pending:
+                    metrics.inc("wordle_solver_requests_total", outcome="rejected")
+                    raise Overloaded(f"{len(self._pending)} positions are already being scored")
+                metrics.inc("wordle_solver_requests_total", outcome="queued")
+                future = self._pool.submit(fn, *args)
+                self._pending[key] = future
+        if submitted:
+            # outside the lock: the callback runs right here if the future is already done
+            future.add_done_callback(lambda _: self._done(key))
+        return future.result()
+
+    def _done(self, key):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
@@ -0,0 +1,148 @@
+from collections import OrderedDict
+import json
+import secrets
+import threading
+import time
+
+from solver import GameState, best_guesses_for_state, decode_feedback, encode_feedback
+
+GAME_SESSION_TTL = 60 * 60  # seconds a game is kept after its last request
+MAX_GAME_SESSIONS = 10000
+
+
+class GameSession:
+    """
+    One game kept on the server. The history is stored as (guess index,
+    feedback code) pairs next to the current GameState, so a new guess only
+    narrows the remaining answers once and the position's scores are computed
+    at most once. Guesses outside the vocabulary are stored as the word itself.
+    """
+
+    def __init__(self, context, answer=None, manual_feedback=False, session_id=None, moves=None):
+        self.id = session_id or secrets.token_urlsafe(16)
+        self.context = context
+        self.answer = answer  # index into context.answer_list, None for manual feedback
+        self.manual_feedback = manual_feedback
+        self.moves = []
+        self.state = GameState(context)
+        self._scores = None
+        for g_idx, code in moves or ():
+            self.play(g_idx, code)
+
+    def play(self, guess, code):
+        if isinstance(guess, str):
+            self.state.apply_word(guess, decode_feedback(int(code), len(guess)))
+        else:
+            self.state.apply_code(guess, code)
+        self.moves.append((guess if isinstance(guess, str) else int(guess), int(code)))
+        self._scores = None
+
+    def guess(self, word):
+        """Play a word against the session's answer and return its feedback string."""
+        g_idx = self.context.word_to_index.get(word)
+        if g_idx is None:
+            self.play(word, int(self.context.letter_index.feedback_codes(word, [self.answer])[0]))
+        else:
+            self.play(g_idx, int(self.context.feedback_codes(g_idx, [self.answer])[0]))
+        return self.state.history[-1][1]
+
+    def sync(self, history):
+        """
+        Bring the game in line with a full (word, feedback) history sent by the
+        client. Only the moves after the common prefix are applied.
+        """
+        moves = [(self.context.word_to_index.get(word, word), encode_feedback(fb)) for word, fb in history]
+        if moves[:len(self.moves)] != self.moves:
+            self.moves = []
+            self.state = GameState(self.context)
+            self._scores = None
+        for g_idx, code in moves[len(self.moves):]:
+            self.play(g_idx, code)
+
+    @property
+    def history(self):
+        return [{"guess": word, "feedback": fb} for word, fb in self.state.history]
+
+    def scores(self, executor=None):
+        """GuessScores of the current position, or None once no answer is left."""
+        if self._scores is None and len(self.state) > 0:
+            self._scores = executor.scores(self.state) if executor is not None else best_guesses_for_state(self.state)
+        return self._scores
+
+    def to_dict(self):
+        return {"id": self.id, "answer": self.answer, "manual_feedback": self.manual_feedback, "moves": self.moves}
+
+    @classmethod
+    def from_dict(cls, context, data):
+        return cls(context, data["answer"], data["manual_feedback"], data["id"], data["moves"])
+
+
+#region Stores
+class MemorySessionStore:
+    """Sessions held in this process, dropped `ttl` seconds after their last use or when over `max_sessions`."""
+
+    def __init__(self, ttl=GAME_SESSION_TTL, max_sessions=MAX_GAME_SESSIONS):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._sessions:
+            session_id, (touched, _) = next(iter(self._sessions.items()))
+            if now - touched < self.ttl and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session_id]
+
+    def get(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            self._sessions[session_id] = (now, entry[1])
+            self._sessions.move_to_end(session_id)
+            return entry[1]
+
+    def save(self, game):
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[game.id] = (now, game)
+            self._sessions.move_to_end(game.id)
+            self._expire(now)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class KeyValueSessionStore:
+    """
+    Sessions serialised into a key-value client with get/set(ex=)/delete,
+    e.g. a redis.Redis instance, so several server processes can share
+    games. The compact moves are replayed on load.
+    """
+
+    def __init__(self, client, context, ttl=GAME_SESSION_TTL, prefix="wordle:game:"):
+        self.client = client
+        self.context = context
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, session_id):
+        data = self.client.get(self.prefix + session_id)
+        if data is None:
+            return None
+        self.client.set(self.prefix + session_id, data, ex=self.ttl)
+        return GameSession.from_dict(self.context, json.loads(data))
+
+    def save(self, game):
+        self.client.set(self.prefix + game.id, json.dumps(game.to_dict()), ex=self.ttl)
+
+    def delete(self, session_id):
+        self.client.delete(self.prefix + session_id)
+#endregion
@@ -1,44 +1,409 @@
-from collections import Counter
+from collections import OrderedDict
 import csv
 import json
-import multiprocessing
 from pathlib import Path
 import random
+import shutil
 import sys
 import numpy as np
-from numba import njit, prange
+from numba import get_num_threads, njit, prange
 import datetime
 from functools import wraps
+import hashlib
+import itertools
 import os
-from tqdm import tqdm
-from concurrent.futures import ProcessPoolExecutor, as_completed
-import cProfile
-import pstats
-
-NO_HISTORY_CACHE_FILE = "data/no_history_guesses_cache.npz"
+import struct
+import threading
+import time
+
+import metrics
+
+DATA_DIR = os.environ.get("WORDLE_DATA_DIR", "data")
+FEEDBACK_MATRIX_FILE = "feedback_matrix.wfm"
+LEGACY_FEEDBACK_MATRIX_FILE = "feedback_matrix.npy"
+FEEDBACK_MATRIX_MAGIC = b"WORDLEFM"
+FEEDBACK_MATRIX_VERSION = 2
+FEEDBACK_MATRIX_ALIGN = 4096
+FEEDBACK_PATTERNS = 3 ** 5
+NO_HISTORY_CACHE_FILE = "no_history_guesses_cache.npz"  # in the context's data directory
+SCORE_CACHE_SIZE = 128
+STARTUP = {}  # seconds spent in each startup stage of this process
+LOW_MEMORY = os.environ.get("WORDLE_LOW_MEMORY") == "1"  # never load the feedback matrix
+SCORING_MODE = os.environ.get("WORDLE_SCORING", "letters" if LOW_MEMORY else "auto")  # auto, matrix or letters
+MAX_MATRIX_BYTES = 1 << 30  # auto mode never uses a bigger feedback matrix ...
+MATRIX_MEMORY_FRACTION = 0.25  # ... or one taking more than this share of available memory
+ANALYSIS_BATCH_SIZE = 10000  # games whose positions are deduplicated together
+OPENING_BOOK_DIR = "opening_book"
+PARTITION_INDEX_DIR = "partition_index"
+LOOKAHEAD_CANDIDATES = 10  # best one-step guesses scored two turns deep
+LOOKAHEAD_EXACT_MAX_REMAINING = 200  # larger positions are looked ahead on samples:
+LOOKAHEAD_SAMPLE_ANSWERS = 64  # at most this many answers of each feedback bucket,
+LOOKAHEAD_FOLLOWUP_GUESSES = 500  # against only the position's best one-step guesses
+LOOKAHEAD_BUDGET = float(os.environ.get("WORDLE_LOOKAHEAD_BUDGET", "0.25"))  # seconds per /best_options lookahead
 SIMULATION_SAVE_DIR = "simulation_results"
+SIMULATION_FIELDS = ["answer", "solved", "guesses_taken", "history"]
+SIMULATION_CHECKPOINT_ROWS = 256  # rows written between checkpoints
 
 
 
 #region Data
-def save_feedback_data(words, feedback_matrix, save_dir="data",):
+def read_word_list(path):
+    with open(path, "r") as f:
+        return [w.strip() for w in f if w.strip()]
+
+def vocabulary_hash(words):
+    return hashlib.sha1("\n".join(words).encode("utf8")).hexdigest()
+
+def _feedback_matrix_prefix(guesses, answers):
+    header = {
+        "version": FEEDBACK_MATRIX_VERSION,
+        "dtype": feedback_dtype(len(guesses[0]) if len(guesses) else 0).name,
+        "shape": [len(guesses), len(answers)],
+        "word_length": len(guesses[0]) if len(guesses) else 0,
+        "guesses_hash": vocabulary_hash(guesses),
+        "answers_hash": vocabulary_hash(answers),
+    }
+    payload = json.dumps(header).encode("utf8")
+    prefix = FEEDBACK_MATRIX_MAGIC + struct.pack("<II", FEEDBACK_MATRIX_VERSION, len(payload)) + payload
+    offset = -(-len(prefix) // FEEDBACK_MATRIX_ALIGN) * FEEDBACK_MATRIX_ALIGN
+    return prefix + b"\0" * (offset - len(prefix))
+
+def read_feedback_header(path):
+    """
+    Read the header of a feedback matrix file.
+
+    Layout: 8-byte magic, uint32 version, uint32 header length, JSON header,
+    zero padding up to a page boundary, then the codes (uint8 for words of up
+    to 5 letters, uint16 above) in row-major guesses x answers order.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(FEEDBACK_MATRIX_MAGIC)) != FEEDBACK_MATRIX_MAGIC:
+            raise ValueError(f"'{path}' is not a feedback matrix file")
+        version, length = struct.unpack("<II", f.read(8))
+        if version != FEEDBACK_MATRIX_VERSION:
+            raise ValueError(f"Unsupported feedback matrix version {version} in '{path}'")
+        header = json.loads(f.read(length))
+
+    prefix_length = len(FEEDBACK_MATRIX_MAGIC) + 8 + length
+    header["offset"] = -(-prefix_length // FEEDBACK_MATRIX_ALIGN) * FEEDBACK_MATRIX_ALIGN
+    return header
+
+def create_feedback_matrix_file(path, guesses, answers):
+    """Write the header for a guesses x answers matrix and return the writable body as a memmap."""
+    dtype = feedback_dtype(len(guesses[0]) if len(guesses) else 0)
+    prefix = _feedback_matrix_prefix(guesses, answers)
+    with open(path, "wb") as f:
+        f.write(prefix)
+        f.truncate(len(prefix) + len(guesses) * len(answers) * dtype.itemsize)
+    return np.memmap(path, dtype=dtype, mode="r+", offset=len(prefix), shape=(len(guesses), len(answers)))
+
+def write_feedback_matrix(path, feedback_matrix, guesses, answers, block_rows=1024):
+    out = create_feedback_matrix_file(path, guesses, answers)
+    for start in range(0, len(guesses), block_rows):
+        out[start:start + block_rows] = feedback_matrix[start:start + block_rows]
+    out.flush()
+    del out
+
+def load_feedback_matrix(path, guesses=None, answers=None):
+    """Memory-map a feedback matrix file read-only, validating it against the given word lists."""
+    header = read_feedback_header(path)
+    shape = tuple(header["shape"])
+
+    for name, words, size in (("guesses", guesses, shape[0]), ("answers", answers, shape[1])):
+        if words is None:
+            continue
+        if len(words) != size or vocabulary_hash(words) != header[f"{name}_hash"]:
+            raise ValueError(f"'{path}' was built for a different {name} vocabulary")
+
+    dtype = np.dtype(header["dtype"])
+    if os.path.getsize(path) < header["offset"] + shape[0] * shape[1] * dtype.itemsize:
+        raise ValueError(f"'{path}' is truncated")
+    if os.path.exists(f"{path}.progress"):
+        raise ValueError(f"'{path}' is only partially built, rerun build_feedback_matrix_file to resume it")
+
+    return np.memmap(path, dtype=dtype, mode="r", offset=header["offset"], shape=shape)
+
+def data_dir_for_length(word_length):
+    """Data directory of a word length: DATA_DIR for 5 letters, a subdirectory of it for other variants."""
+    return DATA_DIR if word_length == 5 else f"{DATA_DIR}/{word_length}_letters"
+
+def save_word_lists(words, save_dir="data", answers=None):
     os.makedirs(save_dir, exist_ok=True)
 
-    np.save(f"{save_dir}/feedback_matrix.npy", feedback_matrix)
-
     with open(f"{save_dir}/words.txt", "w") as f:
         f.write("\n".join(words))
 
+    answers_path = f"{save_dir}/answers.txt"
+    if answers is not None:
+        with open(answers_path, "w") as f:
+            f.write("\n".join(answers))
+    elif os.path.exists(answers_path):
+        os.remove(answers_path)
+
+def save_feedback_data(words, feedback_matrix, save_dir="data", answers=None):
+    save_word_lists(words, save_dir, answers)
+    write_feedback_matrix(f"{save_dir}/{FEEDBACK_MATRIX_FILE}", feedback_matrix, words, answers if answers is not None else words)
+
     print(f"Saved feedback matrix and words to '{save_dir}'")
 
+def convert_feedback_matrix(save_dir="data"):
+    """Rewrite the legacy square uint16 feedback_matrix.npy in the compact uint8 format."""
+    words = read_word_list(f"{save_dir}/words.txt")
+    legacy = np.load(f"{save_dir}/{LEGACY_FEEDBACK_MATRIX_FILE}", mmap_mode="r")
+    write_feedback_matrix(f"{save_dir}/{FEEDBACK_MATRIX_FILE}", legacy, words, words)
+    print(f"Converted '{LEGACY_FEEDBACK_MATRIX_FILE}' to '{FEEDBACK_MATRIX_FILE}' in '{save_dir}'")
+
 def load_feedback_data(save_dir="data"):
-    feedback_matrix = np.load(f"{save_dir}/feedback_matrix.npy")
-    with open(f"{save_dir}/words.txt", "r") as f:
-        words = [w.strip() for w in f if w.strip()]
-    word_to_index = {w: i for i, w in enumerate(words)}
-    
-    print(f"Loaded {len(words)} words and feedback matrix from '{save_dir}'")
-    return words, feedback_matrix, word_to_index
+    context = SolverContext.load(save_dir)
+    print(f"Loaded {len(context.word_list)} words and feedback matrix from '{save_dir}'")
+    return context.word_list, context.feedback_matrix, context.word_to_index
+
+def encode_words(words):
+    """Return the words as a (n, word_length) uint8 array of letter codes (a=0 ... z=25)."""
+    if len(words) == 0:
+        return np.zeros((0, 0), dtype=np.uint8)
+    joined = "".join(words).encode("ascii")
+    letters = np.frombuffer(joined, dtype=np.uint8) - ord("a")
+    return letters.reshape(len(words), -1).copy()
+
+def feedback_dtype(word_length):
+    """Smallest unsigned dtype holding every feedback code of that word length (uint8 up to 5 letters)."""
+    return np.min_scalar_type(3 ** word_length - 1)
+
+def available_memory():
+    """Bytes of memory available for new data (MemAvailable on Linux, else physical memory), or None."""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def matrix_budget(memory=None):
+    """Bytes of feedback matrix auto mode accepts: MAX_MATRIX_BYTES, capped at MATRIX_MEMORY_FRACTION of memory."""
+    if memory is None:
+        memory = available_memory()
+    return MAX_MATRIX_BYTES if memory is None else min(MAX_MATRIX_BYTES, int(memory * MATRIX_MEMORY_FRACTION))
+
+def choose_scoring_mode(n_guesses, n_answers, word_length, memory=None):
+    """
+    "matrix" when a guesses x answers feedback matrix fits matrix_budget(),
+    otherwise "letters" (feedback computed on the fly from the words).
+    """
+    matrix_bytes = n_guesses * n_answers * feedback_dtype(word_length).itemsize
+    return "matrix" if matrix_bytes <= matrix_budget(memory) else "letters"
+
+class SolverContext:
+    """
+    Long-lived, read-only solver data shared by every request in the process.
+
+    The feedback matrix is memory-mapped read-only, so all workers serving from
+    the same data directory share one copy through the OS page cache instead of
+    each holding a private copy. Without a matrix (feedback_matrix=None),
+    the "letters" scoring mode, feedback codes are computed on the fly from
+    the encoded words, which is what makes long-word vocabularies feasible.
+    """
+
+    def __init__(self, words, feedback_matrix, word_to_index=None, save_dir=None, answers=None):
+        self.save_dir = save_dir
+        self.feedback_matrix = feedback_matrix
+        self.word_list = list(words)
+        self.words = np.asarray(words)
+        self.word_to_index = word_to_index if word_to_index is not None else {w: i for i, w in enumerate(self.word_list)}
+
+        if answers is None:
+            self.answer_list = self.word_list
+            self.answers = self.words
+            self.answer_to_index = self.word_to_index
+        else:
+            self.answer_list = list(answers)
+            self.answers = np.asarray(answers)
+            self.answer_to_index = {w: i for i, w in enumerate(self.answer_list)}
+
+        if feedback_matrix is not None and feedback_matrix.shape != (len(self.word_list), len(self.answer_list)):
+            raise ValueError(
+                f"Feedback matrix shape {feedback_matrix.shape} does not match "
+                f"{len(self.word_list)} guesses x {len(self.answer_list)} answers"
+            )
+
+        self.word_length = len(self.word_list[0]) if self.word_list else 0
+        self.n_patterns = 3 ** self.word_length
+        self.scoring_mode = "matrix" if feedback_matrix is not None else "letters"
+
+        # Only the vocabularies: both scoring modes give the same feedback, so
+        # matrix and letters contexts share books, indexes, trees and runs.
+        self.version = hashlib.sha1(
+            f"{vocabulary_hash(self.word_list)}:{vocabulary_hash(self.answer_list)}:{self.word_length}".encode("utf8")
+        ).hexdigest()[:16]
+        self.score_cache = ScoreCache(self.version)
+        self.lookahead_cache = ScoreCache(self.version)
+
+        self.opening_book = None
+        self.partition_index = None
+        self._letters = None
+        self._answer_letters = None
+        self._letter_index = None
+        self._answer_guess_indices = None
+        self.warmed_up = False
+
+    @classmethod
+    def load(cls, save_dir=DATA_DIR, mode="matrix"):
+        """
+        Load the data directory, preferring the compact matrix file and
+        falling back to the legacy square uint16 feedback_matrix.npy. With
+        mode="letters" only the word lists are read; "auto" loads a matrix
+        file only if choose_scoring_mode() says it fits.
+        """
+        words = read_word_list(f"{save_dir}/words.txt")
+        answers = None
+        if os.path.exists(f"{save_dir}/answers.txt"):
+            answers = read_word_list(f"{save_dir}/answers.txt")
+
+        matrix_path = f"{save_dir}/{FEEDBACK_MATRIX_FILE}"
+        if mode == "auto":
+            paths = [p for p in (matrix_path, f"{save_dir}/{LEGACY_FEEDBACK_MATRIX_FILE}") if os.path.exists(p)]
+            mode = "matrix" if paths and os.path.getsize(paths[0]) <= matrix_budget() else "letters"
+
+        if mode == "letters":
+            feedback_matrix = None
+        elif os.path.exists(matrix_path):
+            feedback_matrix = load_feedback_matrix(matrix_path, words, answers if answers is not None else words)
+        else:
+            feedback_matrix = np.load(f"{save_dir}/{LEGACY_FEEDBACK_MATRIX_FILE}", mmap_mode="r")
+            answers = None
+
+        context = cls(words, feedback_matrix, save_dir=save_dir, answers=answers)
+        book_path = f"{save_dir}/{OPENING_BOOK_DIR}"
+        if os.path.exists(f"{book_path}/index.json"):
+            context.opening_book = OpeningBook.load(book_path, context)
+        index_path = f"{save_dir}/{PARTITION_INDEX_DIR}"
+        if os.path.exists(f"{index_path}/index.json"):
+            context.partition_index = PartitionIndex.load(index_path, context)
+        return context
+
+    def encode(self):
+        """Encode the guess and answer words now instead of on first use by a request."""
+        return self.letters, self.answer_letters
+
+    @property
+    def letters(self):
+        if self._letters is None:
+            self._letters = encode_words(self.word_list)
+        return self._letters
+
+    @property
+    def answer_letters(self):
+        if self._answer_letters is None:
+            self._answer_letters = self.letters if self.answer_list is self.word_list else encode_words(self.answer_list)
+        return self._answer_letters
+
+    @property
+    def letter_index(self):
+        if self._letter_index is None:
+            self._letter_index = LetterIndex(self.answer_list)
+        return self._letter_index
+
+    @property
+    def answer_guess_indices(self):
+        """Guess index of every answer, or -1 for answers that are not valid guesses."""
+        if self._answer_guess_indices is None:
+            if self.answer_list is self.word_list:
+                self._answer_guess_indices = np.arange(len(self.word_list), dtype=np.int32)
+            else:
+                self._answer_guess_indices = np.array(
+                    [self.word_to_index.get(w, -1) for w in self.answer_list], dtype=np.int32
+                )
+        return self._answer_guess_indices
+
+    def feedback_codes(self, guess_indices, answer_indices=None):
+        """
+        Feedback codes of one guess (a row) or of several (a guesses x answers
+        block) against the given answers (all by default), read from the matrix
+        or, without one, computed from the letters.
+        """
+        single = np.ndim(guess_indices) == 0
+        if self.feedback_matrix is not None:
+            if answer_indices is None:
+                return self.feedback_matrix[guess_indices]
+            if single:
+                return self.feedback_matrix[guess_indices, answer_indices]
+            return self.feedback_matrix[np.ix_(guess_indices, answer_indices)]
+
+        guess_letters = self.letters[np.atleast_1d(guess_indices)]
+        answer_letters = self.answer_letters if answer_indices is None else self.answer_letters[answer_indices]
+        out = np.empty((len(guess_letters), len(answer_letters)), dtype=feedback_dtype(self.word_length))
+        _feedback_codes_serial(guess_letters, answer_letters, out)
+        return out[0] if single else out
+
+    def warm_up(self):
+        """Fault the matrix into the page cache (if there is one) and JIT-compile the scoring kernel."""
+        if self.warmed_up:
+            return
+        if self.feedback_matrix is not None:
+            for start in range(0, self.feedback_matrix.shape[0], 1024):
+                self.feedback_matrix[start:start + 1024].sum()
+        compute_metrics(self, np.zeros(1, dtype=np.int32), np.zeros(1, dtype=np.int32))
+        self.warmed_up = True
+
+_context = None
+_context_lock = threading.Lock()
+
+def get_context(save_dir=DATA_DIR):
+    """Return the process-wide SolverContext, creating it on first use."""
+    global _context
+    if _context is not None and _context.save_dir == save_dir:
+        return _context
+
+    with _context_lock:
+        if _context is None or _context.save_dir != save_dir:
+            started = time.perf_counter()
+            with metrics.span("load_context"):
+                _context = SolverContext.load(save_dir, mode=SCORING_MODE)
+                _context.encode()
+            STARTUP["load_context"] = time.perf_counter() - started
+            print(f"Loaded {len(_context.word_list)} {_context.word_length}-letter words from '{save_dir}' "
+                  f"({_context.scoring_mode} scoring)")
+    return _context
+
+_legacy_context = None
+
+def _context_for(words, feedback_matrix, word_to_index):
+    """
+    Context for the older (words, feedback_matrix, word_to_index) entry points:
+    the shared context when it holds the same matrix and words, otherwise one
+    built on the first call and reused while the same arguments keep coming.
+    """
+    global _legacy_context
+    for context in (_context, _legacy_context):
+        if (context is not None and context.feedback_matrix is feedback_matrix
+                and len(context.word_list) == len(words) and context.word_list == list(words)):
+            return context
+    _legacy_context = SolverContext(words, feedback_matrix, word_to_index)
+    return _legacy_context
+
+def warm_up(save_dir=DATA_DIR):
+    """
+    Eagerly create and warm the shared context, e.g. before forking web
+    workers, and print how long each startup stage took.
+    """
+    context = get_context(save_dir)
+
+    started = time.perf_counter()
+    kernels = compile_kernels()
+    STARTUP["compile_kernels"] = time.perf_counter() - started
+    started = time.perf_counter()
+    context.warm_up()
+    STARTUP["page_in"] = time.perf_counter() - started
+
+    stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in STARTUP.items())
+    compiled = ", ".join(f"{name} {hits} cached/{misses} compiled" for name, (hits, misses) in kernels.items())
+    print(f"Startup: {stages} ({compiled})")
+    return context
 
 def read_word_dataset(letters_count:int, take: int = None):
     script_dir = Path(__file__).parent
@@ -78,23 +443,137 @@ def get_feedback_code(guess: str, answer: str) -> int:
         code = code * 3 + f
     return code
 
-def build_feedback_matrix(words):
-    n = len(words)
-    matrix = np.zeros((n, n), dtype=np.uint16)
-    print(f"Building feedback matrix for {n} words...")
+@njit(cache=True)
+def _feedback_code(guess, answer, answer_counts):
+    """get_feedback_code on encoded letters; answer_counts is a zeroed scratch array, left zeroed."""
+    word_length = len(answer)
+    for k in range(word_length):
+        answer_counts[answer[k]] += 1
+
+    code = 0
+    for k in range(word_length):
+        g = guess[k]
+        f = 0
+        if g == answer[k]:
+            f = 2
+            answer_counts[g] -= 1
+        elif answer_counts[g] > 0:
+            f = 1
+            answer_counts[g] -= 1
+        code = code * 3 + f
 
-    for i, g in enumerate(words):
-        for j, a in enumerate(words):
-            matrix[i, j] = get_feedback_code(g, a)
+    for k in range(word_length):
+        answer_counts[answer[k]] = 0
+    return code
 
-        if (i + 1) % max(1, n // 20) == 0 or i == n - 1:
-            percent = (i + 1) / n * 100
-            sys.stdout.write(f"\rProgress: {percent:5.1f}% ({i+1}/{n})")
-            sys.stdout.flush()
+@njit(parallel=True, cache=True)
+def feedback_codes_numba(guess_letters, answer_letters, out):
+    """Fill out[i, j] with get_feedback_code(guess i, answer j) from encoded letters."""
+    n_answers = answer_letters.shape[0]
+
+    for i in prange(guess_letters.shape[0]):
+        answer_counts = np.zeros(256, dtype=np.int32)
+        for j in range(n_answers):
+            out[i, j] = _feedback_code(guess_letters[i], answer_letters[j], answer_counts)
+
+@njit(cache=True)
+def _feedback_codes_serial(guess_letters, answer_letters, out):
+    """
+    feedback_codes_numba on the calling thread. Request threads use it for
+    their few rows, since the default threading layer aborts when two
+    threads launch parallel kernels at once.
+    """
+    answer_counts = np.zeros(256, dtype=np.int32)
+    for i in range(guess_letters.shape[0]):
+        for j in range(answer_letters.shape[0]):
+            out[i, j] = _feedback_code(guess_letters[i], answer_letters[j], answer_counts)
+
+def _print_build_progress(done, n):
+    percent = done / n * 100
+    sys.stdout.write(f"\rProgress: {percent:5.1f}% ({done}/{n})")
+    sys.stdout.flush()
+
+def build_feedback_matrix(words, answers=None, block_rows=512):
+    if answers is None:
+        answers = words
+    n = len(words)
+    matrix = np.zeros((n, len(answers)), dtype=feedback_dtype(len(words[0])))
+    print(f"Building feedback matrix for {n} guesses x {len(answers)} answers...")
+
+    guess_letters = encode_words(words)
+    answer_letters = encode_words(answers)
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        feedback_codes_numba(guess_letters[start:stop], answer_letters, matrix[start:stop])
+        _print_build_progress(stop, n)
 
     print("\nFeedback matrix built.")
     return matrix
 
+def build_feedback_matrix_file(path, words, answers=None, block_rows=512, resume=True):
+    """
+    Build the feedback matrix straight into a memory-mapped matrix file, one
+    block of guess rows at a time.
+
+    Finished rows are recorded in "<path>.progress" after every block, so an
+    interrupted build resumes where it stopped when called again with the same
+    word lists.
+    """
+    if answers is None:
+        answers = words
+    n = len(words)
+    progress_path = f"{path}.progress"
+
+    start_row = 0
+    out = None
+    if resume and os.path.exists(path) and os.path.exists(progress_path):
+        header = read_feedback_header(path)
+        if (header["guesses_hash"] == vocabulary_hash(words)
+                and header["answers_hash"] == vocabulary_hash(answers)):
+            out = np.memmap(path, dtype=np.dtype(header["dtype"]), mode="r+", offset=header["offset"],
+                            shape=(n, len(answers)))
+            with open(progress_path, "r") as f:
+                start_row = int(f.read().strip() or 0)
+            print(f"Resuming feedback matrix build at row {start_row}/{n}")
+
+    if out is None:
+        out = create_feedback_matrix_file(path, words, answers)
+        with open(progress_path, "w") as f:
+            f.write("0")
+
+    print(f"Building feedback matrix for {n} guesses x {len(answers)} answers into '{path}'...")
+    guess_letters = encode_words(words)
+    answer_letters = encode_words(answers)
+    for start in range(start_row, n, block_rows):
+        stop = min(start + block_rows, n)
+        feedback_codes_numba(guess_letters[start:stop], answer_letters, out[start:stop])
+        out.flush()
+        with open(progress_path, "w") as f:
+            f.write(str(stop))
+        _print_build_progress(stop, n)
+
+    del out
+    os.remove(progress_path)
+    print("\nFeedback matrix built.")
+
+    verify_feedback_matrix(load_feedback_matrix(path, words, answers), words, answers)
+
+def verify_feedback_matrix(feedback_matrix, words, answers=None, samples=10000, seed=0):
+    """Spot-check random cells of a built matrix against get_feedback_code."""
+    if answers is None:
+        answers = words
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(words), size=samples)
+    cols = rng.integers(0, len(answers), size=samples)
+
+    for i, j in zip(rows, cols):
+        expected = get_feedback_code(words[i], answers[j])
+        if feedback_matrix[i, j] != expected:
+            raise ValueError(
+                f"Feedback matrix mismatch for guess '{words[i]}' / answer '{answers[j]}': "
+                f"{feedback_matrix[i, j]} != {expected}"
+            )
+
 #endregion
 
 #region Solver
@@ -104,350 +583,1920 @@ def encode_feedback(fb_str: str) -> int:
         code = code * 3 + {'B':0, 'Y':1, 'G':2}[ch]
     return code
 
-def get_and_decode_feedback(guess: str, answer: str) -> str:
-    code = get_feedback_code(guess, answer)
+def decode_feedback(code: int, length: int = 5) -> str:
     chars = []
-    for _ in range(5): 
+    for _ in range(length):
         code, r = divmod(code, 3)
         chars.append("BYG"[r])
     return "".join(reversed(chars))
 
-def filter_words(words, feedback_matrix, word_to_index, history):
-    remaining_mask = np.ones(len(words), dtype=bool)
+def get_and_decode_feedback(guess: str, answer: str) -> str:
+    return decode_feedback(get_feedback_code(guess, answer), len(guess))
+
+class LetterIndex:
+    """
+    Compact per-answer index for filtering without the feedback matrix: a
+    one-bit-per-letter mask for every position and a vector of letter counts.
+    Feedback for any guess word, in the vocabulary or not, is derived from it
+    with vectorised mask operations that follow get_feedback_code exactly,
+    including its single left-to-right pass over duplicate letters.
+    """
+
+    def __init__(self, answers):
+        letters = encode_words(answers).astype(np.int64)
+        self.word_length = letters.shape[1]
+        self.position_masks = (np.uint32(1) << letters).astype(np.uint32)
+        self.letter_counts = np.zeros((len(answers), 26), dtype=np.uint8)
+        for position in range(self.word_length):
+            np.add.at(self.letter_counts, (np.arange(len(answers)), letters[:, position]), 1)
+
+    @property
+    def nbytes(self):
+        return self.position_masks.nbytes + self.letter_counts.nbytes
+
+    def feedback_codes(self, guess, indices=None):
+        """Feedback code of `guess` against each answer (all of them, or the given indices)."""
+        if len(guess) != self.word_length or not guess.isalpha() or not guess.isascii():
+            raise ValueError(f"'{guess}' is not a {self.word_length}-letter word")
+        letters = encode_words([guess.lower()])[0]
+        masks = self.position_masks if indices is None else self.position_masks[indices]
+
+        # only the guess's own letters are counted; int16 since a late green
+        # may take a letter that an earlier yellow already used up
+        distinct = np.unique(letters)
+        counts = (self.letter_counts if indices is None else self.letter_counts[indices])[:, distinct].astype(np.int16)
+        column = {letter: c for c, letter in enumerate(distinct)}
+
+        codes = np.zeros(len(masks), dtype=np.int32)
+        for position, letter in enumerate(letters):
+            available = counts[:, column[letter]]
+            green = (masks[:, position] & np.uint32(1 << int(letter))) != 0
+            yellow = ~green & (available > 0)
+            available -= green | yellow
+            codes = codes * 3 + 2 * green + yellow
+        return codes
+
+    def filter(self, remaining, guess, fb_code):
+        """The remaining answer indices that give `fb_code` for `guess`."""
+        return remaining[self.feedback_codes(guess, remaining) == fb_code]
+
+class GameState:
+    """
+    Remaining answers of one game, kept as an int32 index array into the context's words.
+
+    Each new (guess, feedback) only looks at the columns that survived the previous
+    turns, and clone() copies just that array, so branching a position is cheap.
+    """
+
+    def __init__(self, context, remaining=None, history=None):
+        self.context = context
+        if remaining is None:
+            remaining = np.arange(len(context.answer_list), dtype=np.int32)
+        self.remaining = remaining
+        self.history = list(history) if history is not None else []
+
+    @classmethod
+    @metrics.timed("filter")
+    def from_history(cls, context, history):
+        state = cls(context)
+        for guess, fb_str in history:
+            state.apply(guess, fb_str)
+        return state
+
+    def __len__(self):
+        return len(self.remaining)
+
+    def apply_code(self, g_idx, fb_code):
+        index = self.context.partition_index
+        if index is not None and len(self.remaining) == len(self.context.answer_list) and g_idx in index:
+            # every answer is still possible, so the bucket is a slice of the index instead of a row scan
+            self.remaining = index.bucket(g_idx, fb_code).astype(np.int32)
+        else:
+            self.remaining = self.remaining[self.context.feedback_codes(g_idx, self.remaining) == fb_code]
+        guess = self.context.word_list[g_idx]
+        self.history.append((guess, decode_feedback(int(fb_code), len(guess))))
+        return self
+
+    def apply(self, guess, fb_str):
+        g_idx = self.context.word_to_index.get(guess)
+        if g_idx is None:
+            return self.apply_word(guess, fb_str)
+        return self.apply_code(g_idx, encode_feedback(fb_str))
+
+    def apply_word(self, guess, fb_str):
+        """Narrow by any guess word, in the vocabulary or not, through the context's LetterIndex."""
+        self.remaining = self.context.letter_index.filter(self.remaining, guess, encode_feedback(fb_str))
+        self.history.append((guess, fb_str))
+        return self
+
+    def clone(self):
+        return GameState(self.context, self.remaining.copy(), self.history)
+
+    def remaining_words(self):
+        return self.context.answers[self.remaining]
 
-    for guess, fb_str in history:
-        fb_code = encode_feedback(fb_str)
-        g_idx = word_to_index[guess]
-        remaining_mask &= (feedback_matrix[g_idx] == fb_code)
+def filter_words(words, feedback_matrix, word_to_index, history):
+    state = GameState.from_history(_context_for(words, feedback_matrix, word_to_index), history)
+    return state.remaining_words()
+
+
+@njit(cache=True)
+def _histogram_scores(counts, total):
+    """Entropy and expected remaining of a feedback histogram, clearing it for the next guess."""
+    H = 0.0
+    E_remain = 0.0
+    for pattern in range(len(counts)):
+        n = counts[pattern]
+        if n > 0:
+            p = n / total
+            H += p * np.log2(1.0 / p)
+            E_remain += p * n
+            counts[pattern] = 0
+    return H, E_remain
+
+@njit(parallel=True, nogil=True, cache=True)
+def _score_candidates_kernel(feedback_matrix, remaining_indices, candidates, n_patterns, n_threads):
+    n_candidates = len(candidates)
+    total = len(remaining_indices)
+    entropies = np.zeros(n_candidates, dtype=np.float64)
+    expected_remaining = np.zeros(n_candidates, dtype=np.float64)
+
+    # one histogram per thread, cleared after each guess instead of reallocated;
+    # the thread count is passed in since reading it here would stop Numba caching the kernel
+    n_threads = min(n_threads, max(n_candidates, 1))
+    histograms = np.zeros((n_threads, n_patterns), dtype=np.int32)
+    chunk = (n_candidates + n_threads - 1) // n_threads
+
+    for t in prange(n_threads):
+        counts = histograms[t]
+        for c in range(t * chunk, min((t + 1) * chunk, n_candidates)):
+            row = feedback_matrix[candidates[c]]
+            for j in range(total):
+                counts[row[remaining_indices[j]]] += 1
+            entropies[c], expected_remaining[c] = _histogram_scores(counts, total)
 
-    return np.array(words)[remaining_mask]
+    return entropies, expected_remaining
 
+@njit(parallel=True, nogil=True, cache=True)
+def _score_candidates_letters_kernel(guess_letters, answer_letters, remaining_indices, candidates, n_patterns, n_threads):
+    """_score_candidates_kernel with each feedback code computed from the letters instead of read from a matrix."""
+    n_candidates = len(candidates)
+    total = len(remaining_indices)
+    entropies = np.zeros(n_candidates, dtype=np.float64)
+    expected_remaining = np.zeros(n_candidates, dtype=np.float64)
+
+    n_threads = min(n_threads, max(n_candidates, 1))
+    histograms = np.zeros((n_threads, n_patterns), dtype=np.int32)
+    chunk = (n_candidates + n_threads - 1) // n_threads
+
+    for t in prange(n_threads):
+        counts = histograms[t]
+        answer_counts = np.zeros(256, dtype=np.int32)
+        for c in range(t * chunk, min((t + 1) * chunk, n_candidates)):
+            guess = guess_letters[candidates[c]]
+            for j in range(total):
+                counts[_feedback_code(guess, answer_letters[remaining_indices[j]], answer_counts)] += 1
+            entropies[c], expected_remaining[c] = _histogram_scores(counts, total)
 
+    return entropies, expected_remaining
 
-@njit(parallel=True)
-def compute_metrics_numba(feedback_matrix, remaining_indices):
-    n_words = feedback_matrix.shape[0]
-    entropies = np.zeros(n_words, dtype=np.float64)
-    expected_remaining = np.zeros(n_words, dtype=np.float64)
+def _kernel_indices(remaining_indices, candidates, n_guesses):
+    remaining_indices = np.ascontiguousarray(remaining_indices, dtype=np.int32)
+    if candidates is None:
+        candidates = np.arange(n_guesses, dtype=np.int32)
+    else:
+        candidates = np.ascontiguousarray(candidates, dtype=np.int32)
+    return remaining_indices, candidates
+
+def compute_metrics_numba(feedback_matrix, remaining_indices, candidates=None, n_patterns=FEEDBACK_PATTERNS):
+    """
+    Entropy and expected remaining of each candidate guess (all guesses by
+    default) against the remaining answer indices, aligned with candidates.
+    """
+    remaining_indices, candidates = _kernel_indices(remaining_indices, candidates, feedback_matrix.shape[0])
+    return _score_candidates_kernel(feedback_matrix, remaining_indices, candidates, n_patterns, get_num_threads())
+
+def compute_metrics_letters(guess_letters, answer_letters, remaining_indices, candidates=None, n_patterns=FEEDBACK_PATTERNS):
+    """compute_metrics_numba without a feedback matrix, from encode_words() of the guesses and answers."""
+    remaining_indices, candidates = _kernel_indices(remaining_indices, candidates, len(guess_letters))
+    return _score_candidates_letters_kernel(guess_letters, answer_letters, remaining_indices, candidates, n_patterns,
+                                            get_num_threads())
+
+def compute_metrics(context, remaining_indices, candidates=None):
+    """compute_metrics_numba or compute_metrics_letters, whichever the context's scoring mode uses."""
+    if context.feedback_matrix is None:
+        return compute_metrics_letters(context.letters, context.answer_letters, remaining_indices, candidates,
+                                       context.n_patterns)
+    return compute_metrics_numba(context.feedback_matrix, remaining_indices, candidates, context.n_patterns)
+
+def compile_kernels():
+    """
+    Compile every kernel for the array types the solver passes it, or load
+    it from Numba's on-disk cache (cache=True) if an earlier process already
+    compiled it. Returns {kernel name: (signatures loaded from cache, compiled)}.
+    """
+    kernels = (_score_candidates_kernel, _score_candidates_letters_kernel, _score_boards_kernel,
+               _score_boards_letters_kernel, _best_followup_kernel, _best_followup_letters_kernel, feedback_codes_numba,
+               _feedback_codes_serial)
+    before = {k: (sum(k.stats.cache_hits.values()), sum(k.stats.cache_misses.values())) for k in kernels}
+
+    # uint8 matrices in memory / shared memory and memory-mapped read-only,
+    # and read-only uint16 matrices (longer words and the legacy .npy)
+    matrices = [np.zeros((1, 1), dtype=np.uint8)]
+    for dtype in (np.uint8, np.uint16):
+        matrix = np.zeros((1, 1), dtype=dtype)
+        matrix.flags.writeable = False
+        matrices.append(matrix)
+    indices = np.zeros(1, dtype=np.int32)
+    board_offsets = np.array([0, 1], dtype=np.int64)
+    for matrix in matrices:
+        _score_candidates_kernel(matrix, indices, indices, FEEDBACK_PATTERNS, 1)
+        _score_boards_kernel(matrix, indices, board_offsets, indices, FEEDBACK_PATTERNS, 1)
+        _best_followup_kernel(matrix, indices, board_offsets, indices, FEEDBACK_PATTERNS, 1)
+
+    letters = np.zeros((1, 5), dtype=np.uint8)
+    _score_candidates_letters_kernel(letters, letters, indices, indices, FEEDBACK_PATTERNS, 1)
+    _score_boards_letters_kernel(letters, letters, indices, board_offsets, indices, FEEDBACK_PATTERNS, 1)
+    _best_followup_letters_kernel(letters, letters, indices, board_offsets, indices, FEEDBACK_PATTERNS, 1)
+    for dtype in (np.uint8, np.uint16):
+        feedback_codes_numba(letters, letters, np.zeros((1, 1), dtype=dtype))
+        _feedback_codes_serial(letters, letters, np.zeros((1, 1), dtype=dtype))
 
-    for g_idx in prange(n_words):  
-        counts = np.zeros(3**5, dtype=np.int32)
-        for j in remaining_indices:
-            pattern = feedback_matrix[g_idx, j]
-            counts[pattern] += 1
+    return {
+        k.__name__: (sum(k.stats.cache_hits.values()) - before[k][0], sum(k.stats.cache_misses.values()) - before[k][1])
+        for k in kernels
+    }
 
-        total = len(remaining_indices)
-        H = 0.0
-        E_remain = 0.0
-        for c in counts:
-            if c > 0:
-                p = c / total
-                H += p * np.log2(1.0 / p)
-                E_remain += p * c
-        entropies[g_idx] = H
-        expected_remaining[g_idx] = E_remain
+def select_k(keys, k, from_end=False):
+    """
+    Positions of the first (or last) k entries of a stable ascending sort of keys,
+    returned in that sorted order. Uses a partial selection (argpartition) so only
+    the selected entries are actually sorted.
+    """
+    n = len(keys)
+    if k >= n:
+        return np.argsort(keys, kind="stable")
+    if k <= 0:
+        return np.zeros(0, dtype=np.intp)
+
+    if from_end:
+        kth = keys[np.argpartition(keys, n - k)[n - k]]
+        strict = np.flatnonzero(keys > kth)
+        ties = np.flatnonzero(keys == kth)
+        chosen = np.concatenate([ties[len(ties) - (k - len(strict)):], strict])
+    else:
+        kth = keys[np.argpartition(keys, k - 1)[k - 1]]
+        strict = np.flatnonzero(keys < kth)
+        ties = np.flatnonzero(keys == kth)
+        chosen = np.concatenate([strict, ties[:k - len(strict)]])
+
+    return chosen[np.lexsort((chosen, keys[chosen]))]
+
+class ScoreCache:
+    """
+    Size-bounded LRU cache of scored positions.
+
+    Entries are keyed by a hash of the sorted remaining answer indices (plus the
+    candidate guesses, if only a subset was scored), so different histories that
+    reach the same remaining set share one entry. The key is namespaced by the
+    context version, which changes whenever the word lists do.
+    Evicted entries are written to spill_dir when one is given and read back on
+    a later miss.
+    """
+
+    def __init__(self, version, max_entries=SCORE_CACHE_SIZE, spill_dir=None):
+        self.version = version
+        self.max_entries = max_entries
+        self.spill_dir = spill_dir
+        self.hits = 0
+        self.misses = 0
+        self.spill_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, remaining, candidates=None):
+        # The same set must give the same key whatever order it comes in. Remaining
+        # sets are normally built ascending already, so only sort when they are not.
+        remaining = np.ascontiguousarray(remaining, dtype=np.int32)
+        if remaining.size > 1 and np.any(remaining[1:] < remaining[:-1]):
+            remaining = np.sort(remaining)
+        digest = hashlib.blake2b(self.version.encode("utf8"), digest_size=16)
+        digest.update(remaining.tobytes())
+        if candidates is not None:
+            digest.update(b"|")
+            digest.update(np.ascontiguousarray(candidates, dtype=np.int32).tobytes())
+        return digest.hexdigest()
+
+    def __contains__(self, key):
+        """Whether key is held in memory; does not count as a lookup."""
+        with self._lock:
+            return key in self._entries
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, self.version, f"{key}.npz")
+
+    def get(self, key):
+        """Return (entropies, expected_remaining) or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        if self.spill_dir is not None and os.path.exists(self._spill_path(key)):
+            data = np.load(self._spill_path(key), allow_pickle=False)
+            entry = (data["entropies"], data["expected_remaining"])
+            with self._lock:
+                self.spill_hits += 1
+            self.put(key, *entry)
+            return entry
+
+        with self._lock:
+            self.misses += 1
+        return None
 
-    return entropies, expected_remaining
+    def put(self, key, entropies, expected_remaining):
+        with self._lock:
+            self._entries[key] = (entropies, expected_remaining)
+            self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False))
+
+        if self.spill_dir is not None:
+            for old_key, (old_entropies, old_expected) in evicted:
+                path = self._spill_path(old_key)
+                if not os.path.exists(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    np.savez(path, entropies=old_entropies, expected_remaining=old_expected)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.spill_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "spill_hits": self.spill_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.spill_hits) / lookups if lookups else 0.0,
+            }
+
+class GuessScores:
+    """
+    Entropy and expected remaining of every guess for one position, as NumPy arrays.
+
+    When only a subset of guesses was scored, `scored` holds their indices and
+    the other entries are NaN.
+    """
+
+    def __init__(self, context, remaining, entropies, expected_remaining, scored=None):
+        self.context = context
+        self.remaining = remaining
+        self.entropies = entropies
+        self.expected_remaining = expected_remaining
+        self.scored = scored
+        self._viable = None
+
+    @classmethod
+    def from_candidates(cls, context, remaining, candidates, entropies, expected_remaining):
+        n_guesses = len(context.word_list)
+        full_entropies = np.full(n_guesses, np.nan)
+        full_expected = np.full(n_guesses, np.nan)
+        full_entropies[candidates] = entropies
+        full_expected[candidates] = expected_remaining
+        return cls(context, remaining, full_entropies, full_expected, scored=candidates)
+
+    def scored_guesses(self):
+        if self.scored is None:
+            return np.arange(len(self.entropies))
+        return self.scored
+
+    def remaining_words(self):
+        return self.context.answers[self.remaining]
+
+    def viable_guesses(self):
+        """Guess indices of the remaining answers, ascending."""
+        if self._viable is None:
+            guess_indices = self.context.answer_guess_indices[self.remaining]
+            self._viable = np.sort(guess_indices[guess_indices >= 0])
+        return self._viable
+
+    def ranked(self, key="entropy", k=10, candidates=None, from_end=False):
+        """
+        Guess indices ranked best-first by entropy (descending) or expected
+        remaining (ascending), limited to k and optionally to candidate guesses.
+        Ties keep word order, like a stable sort of the full list would.
+        """
+        if key == "entropy":
+            keys = -self.entropies
+        else:
+            keys = self.expected_remaining
+        if candidates is None:
+            if self.scored is None:
+                return select_k(keys, k, from_end)
+            candidates = self.scored
+        return candidates[select_k(keys[candidates], k, from_end)]
+
+    def rows(self, indices):
+        words = self.context.words
+        return [(str(words[i]), float(self.entropies[i]), float(self.expected_remaining[i])) for i in indices]
+
+def load_no_history_cache(context):
+    """Return the cached first-turn (entropies, expected_remaining), or None if missing or built for other words."""
+    path = f"{context.save_dir or DATA_DIR}/{NO_HISTORY_CACHE_FILE}"
+    if not os.path.exists(path):
+        return None
+    data = np.load(path, allow_pickle=False)
+    if not np.array_equal(data["names"], context.words) or len(data["remaining"]) != len(context.answer_list):
+        return None
+    return data["entropies"], data["expected_remaining"]
 
-def save_best_guesses(results, remaining):
+def save_best_guesses(scores):
     print("Caching no-history results...")
-    names = np.array([r[0] for r in results])
-    entropies = np.array([r[1] for r in results], dtype=np.float32)
-    expected_remaining = np.array([r[2] for r in results], dtype=np.float32)
-    remaining_arr = np.array(remaining)
-
     np.savez(
-        NO_HISTORY_CACHE_FILE,
-        names=names,
-        entropies=entropies,
-        expected_remaining=expected_remaining,
-        remaining=remaining_arr
+        f"{scores.context.save_dir or DATA_DIR}/{NO_HISTORY_CACHE_FILE}",
+        names=scores.context.words,
+        entropies=scores.entropies.astype(np.float32),
+        expected_remaining=scores.expected_remaining.astype(np.float32),
+        remaining=scores.remaining_words()
     )
 #endregion
 
-#region UI
-def next_best_guesses(words, feedback_matrix, word_to_index, history):
-    if not history and os.path.exists(NO_HISTORY_CACHE_FILE):
-        data = np.load(NO_HISTORY_CACHE_FILE, allow_pickle=False)
-        results = list(zip(data["names"], data["entropies"], data["expected_remaining"]))
-        remaining = data["remaining"].tolist()
-    else:
-        remaining = filter_words(words, feedback_matrix, word_to_index, history)
-        remaining_indices = [word_to_index[w] for w in remaining]
+#region OpeningBook
+class OpeningBook:
+    """
+    Precomputed scores for the positions reachable after a set of openers.
+
+    Stored as a directory: index.json maps remaining-set keys (the same keys as
+    ScoreCache) to rows of the memory-mapped float32 entropies.npy /
+    expected_remaining.npy and int32 top_guesses.npy arrays, plus opener ->
+    feedback code -> row for turn two.
+    """
+
+    def __init__(self, path, index, entropies, expected_remaining, top_guesses):
+        self.path = path
+        self.index = index
+        self.rows = index["rows"]
+        self.entropies = entropies
+        self.expected_remaining = expected_remaining
+        self.top_guesses = top_guesses
+
+    @classmethod
+    def load(cls, path, context):
+        with open(f"{path}/index.json", "r", encoding="utf8") as f:
+            index = json.load(f)
+        if index["version"] != context.version:
+            print(f"Ignoring opening book in '{path}': built for a different vocabulary")
+            return None
 
-        if len(remaining) == 0:
+        return cls(
+            path,
+            index,
+            np.load(f"{path}/entropies.npy", mmap_mode="r"),
+            np.load(f"{path}/expected_remaining.npy", mmap_mode="r"),
+            np.load(f"{path}/top_guesses.npy", mmap_mode="r"),
+        )
+
+    def lookup(self, key):
+        row = self.rows.get(key)
+        if row is None:
             return None
+        return self.entropies[row], self.expected_remaining[row]
+
+    def best_responses(self, context, opener, k=5):
+        """Top-k second guesses by entropy for every feedback pattern of the opener."""
+        patterns = self.index["openers"].get(opener, {})
+        return {
+            decode_feedback(int(code), len(opener)): [context.word_list[i] for i in self.top_guesses[row][:k]]
+            for code, row in sorted(patterns.items(), key=lambda item: int(item[0]))
+        }
+
+def _truncate_npy(path, n_rows, block_rows=256):
+    """Rewrite the .npy file at path with only its first n_rows rows, a block at a time."""
+    src = np.load(path, mmap_mode="r")
+    if len(src) == n_rows:
+        return
+    dst = np.lib.format.open_memmap(f"{path}.tmp", mode="w+", dtype=src.dtype, shape=(n_rows,) + src.shape[1:])
+    for start in range(0, n_rows, block_rows):
+        stop = min(start + block_rows, n_rows)
+        dst[start:stop] = src[start:stop]
+    dst.flush()
+    del src, dst
+    os.replace(f"{path}.tmp", path)
+
+def build_opening_book(context, openers, path=None, turns=2, top_k=20, min_remaining=3, third_turn_min_remaining=50):
+    """
+    Score every position reachable after each opener (and, with turns=3, after
+    the opener and the best-entropy reply) and write them as an OpeningBook.
+    Positions smaller than min_remaining are cheap to score live and are skipped.
+    Rows are written to the memory-mapped arrays as they are scored.
+    """
+    if path is None:
+        path = f"{context.save_dir or DATA_DIR}/{OPENING_BOOK_DIR}"
+    os.makedirs(path, exist_ok=True)
+    cache = context.score_cache
+    third_turn_min_remaining = max(min_remaining, third_turn_min_remaining)
+
+    positions = {}
+    opener_rows = {}
+    for opener in openers:
+        g_idx = context.word_to_index[opener]
+        opener_rows[opener] = {}
+        for code in np.unique(context.feedback_codes(g_idx)):
+            state = GameState(context).apply_code(g_idx, code)
+            if len(state) >= min_remaining:
+                key = cache.key(state.remaining)
+                positions.setdefault(key, state)
+                opener_rows[opener][int(code)] = key
+
+    # a third-turn position holds at least third_turn_min_remaining of its parent's answers
+    capacity = len(positions)
+    if turns >= 3:
+        capacity += sum(len(state) // third_turn_min_remaining for state in positions.values())
+
+    n_guesses = len(context.word_list)
+    top_k = min(top_k, n_guesses)
+    arrays = {
+        name: np.lib.format.open_memmap(f"{path}/{name}.npy", mode="w+", dtype=dtype, shape=(capacity, width))
+        for name, dtype, width in (("entropies", np.float32, n_guesses), ("expected_remaining", np.float32, n_guesses),
+                                   ("top_guesses", np.int32, top_k))
+    }
+    rows = {}
 
-        entropies, expected_remaining = compute_metrics_numba(feedback_matrix, remaining_indices)
-        results = [(words[i], float(entropies[i]), float(expected_remaining[i])) for i in range(len(words))]
+    def add_position(key, state):
+        if key in rows:
+            return None
+        e, er = compute_metrics(context, state.remaining)
+        row = rows[key] = len(rows)
+        arrays["entropies"][row] = e
+        arrays["expected_remaining"][row] = er
+        arrays["top_guesses"][row] = select_k(-e, top_k)
+        return e
+
+    from tqdm import tqdm
+
+    for key, state in tqdm(positions.items(), desc="Opening book", ncols=100):
+        e = add_position(key, state)
+        if turns < 3:
+            continue
+        reply = int(np.argmax(arrays["entropies"][rows[key]] if e is None else e))
+        for code in np.unique(context.feedback_codes(reply, state.remaining)):
+            next_state = state.clone().apply_code(reply, code)
+            if len(next_state) >= third_turn_min_remaining:
+                add_position(cache.key(next_state.remaining), next_state)
+
+    for array in arrays.values():
+        array.flush()
+    arrays.clear()
+    for name in ("entropies", "expected_remaining", "top_guesses"):
+        _truncate_npy(f"{path}/{name}.npy", len(rows))
+
+    with open(f"{path}/index.json", "w", encoding="utf8") as f:
+        json.dump({
+            "version": context.version,
+            "turns": turns,
+            "top_k": top_k,
+            "openers": {opener: {code: rows[key] for code, key in codes.items()} for opener, codes in opener_rows.items()},
+            "rows": rows,
+        }, f)
+
+    print(f"Saved opening book with {len(rows)} positions for {len(openers)} openers to '{path}'")
+    return OpeningBook.load(path, context)
 
-        if not history and not os.path.exists(NO_HISTORY_CACHE_FILE):
-            save_best_guesses(results, remaining)
+#endregion
 
-    return remaining, results
+#region PartitionIndex
+class PartitionIndex:
+    """
+    The feedback buckets of a set of guesses over all answers, in CSR form:
+    answers.npy holds each indexed guess's answer indices grouped by feedback
+    code (ascending within a group), offsets.npy where each group starts, and
+    rows.npy the row of every guess (-1 if not indexed). The arrays are
+    memory-mapped, so the first-turn filter and bucket sizes are slices.
+    """
+
+    def __init__(self, path, rows, offsets, answers):
+        self.path = path
+        self.rows = rows
+        self.offsets = offsets
+        self.answers = answers
+
+    @classmethod
+    def load(cls, path, context):
+        with open(f"{path}/index.json", "r", encoding="utf8") as f:
+            index = json.load(f)
+        if index["version"] != context.version:
+            print(f"Ignoring partition index in '{path}': built for a different vocabulary")
+            return None
 
-def load_options_sections(history):
-    words, feedback_matrix, word_to_index = load_feedback_data()
-    data = next_best_guesses(words, feedback_matrix, word_to_index, history)
-    if data is None:
-        return {"remaining_count": 0, "viable_answers": []}
-    
-    remaining, results = data
-
-    if len(remaining) > 2:
-        filtered_results = [
-            (w, float(e), float(er))   # <-- Convert here
-            for (w, e, er) in results
-            if float(e) > 0.0 and float(er) < len(remaining)
+        return cls(
+            path,
+            np.load(f"{path}/rows.npy", mmap_mode="r"),
+            np.load(f"{path}/offsets.npy", mmap_mode="r"),
+            np.load(f"{path}/answers.npy", mmap_mode="r"),
+        )
+
+    def __contains__(self, g_idx):
+        return self.rows[g_idx] >= 0
+
+    def bucket(self, g_idx, code):
+        """Answer indices that give feedback `code` for the guess, ascending."""
+        offsets = self.offsets[self.rows[g_idx]]
+        return self.answers[offsets[int(code)]:offsets[int(code) + 1]]
+
+    def bucket_sizes(self, guess_indices):
+        """Bucket sizes of each guess over all answers, shape (guesses, feedback patterns)."""
+        return np.diff(self.offsets[self.rows[guess_indices]], axis=1)
+
+def build_partition_index(context, guesses=None, path=None, block_rows=256):
+    """
+    Build a PartitionIndex for the given guess words (every guess by default)
+    a block of guesses at a time. Answer indices take 2 bytes each for up to
+    65536 answers, so indexing every guess costs about twice the uint8 matrix.
+    The index is written to a sibling directory and moved into place when
+    complete, so an interrupted build never leaves a mix of old and new files
+    and processes still mapping the old arrays keep reading them.
+    """
+    if path is None:
+        path = f"{context.save_dir or DATA_DIR}/{PARTITION_INDEX_DIR}"
+    final_path, path = path, f"{path}.building"
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+    if guesses is None:
+        guess_indices = np.arange(len(context.word_list), dtype=np.int32)
+    else:
+        guess_indices = np.array([context.word_to_index[w] for w in guesses], dtype=np.int32)
+    n, n_answers, n_patterns = len(guess_indices), len(context.answer_list), context.n_patterns
+
+    rows = np.full(len(context.word_list), -1, dtype=np.int32)
+    rows[guess_indices] = np.arange(n, dtype=np.int32)
+    offsets = np.zeros((n, n_patterns + 1), dtype=np.int64)
+    answers = np.lib.format.open_memmap(f"{path}/answers.npy", mode="w+",
+                                        dtype=np.min_scalar_type(max(n_answers - 1, 0)), shape=(n * n_answers,))
+
+    print(f"Building partition index for {n} guesses x {n_answers} answers into '{path}'...")
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        codes = np.asarray(context.feedback_codes(guess_indices[start:stop]), dtype=np.int64)
+        answers[start * n_answers:stop * n_answers] = np.argsort(codes, axis=1, kind="stable").ravel()
+
+        counts = np.bincount((codes + np.arange(stop - start)[:, None] * n_patterns).ravel(),
+                             minlength=(stop - start) * n_patterns).reshape(-1, n_patterns)
+        offsets[start:stop, 0] = np.arange(start, stop, dtype=np.int64) * n_answers
+        offsets[start:stop, 1:] = offsets[start:stop, :1] + np.cumsum(counts, axis=1)
+        _print_build_progress(stop, n)
+
+    answers.flush()
+    del answers
+    np.save(f"{path}/rows.npy", rows)
+    np.save(f"{path}/offsets.npy", offsets)
+    with open(f"{path}/index.json", "w", encoding="utf8") as f:
+        json.dump({"version": context.version, "guesses": n, "answers": n_answers}, f)
+
+    if os.path.exists(final_path):
+        # without index.json the old directory is never loaded, even half-removed
+        if os.path.exists(f"{final_path}/index.json"):
+            os.remove(f"{final_path}/index.json")
+        shutil.rmtree(final_path)
+    os.replace(path, final_path)
+
+    print(f"\nSaved partition index to '{final_path}'")
+    return PartitionIndex.load(final_path, context)
+
+#endregion
+
+#region Lookahead
+@njit(parallel=True, nogil=True, cache=True)
+def _best_followup_kernel(feedback_matrix, answer_indices, bucket_offsets, candidates, n_patterns, n_threads):
+    """
+    Entropy and expected remaining of the highest-entropy candidate over each
+    bucket answer_indices[bucket_offsets[b]:bucket_offsets[b + 1]].
+    """
+    n_buckets = len(bucket_offsets) - 1
+    entropies = np.zeros(n_buckets, dtype=np.float64)
+    expected_remaining = np.ones(n_buckets, dtype=np.float64)
+
+    # buckets are dealt out round-robin since their sizes vary a lot
+    n_threads = min(n_threads, max(n_buckets, 1))
+    histograms = np.zeros((n_threads, n_patterns), dtype=np.int32)
+
+    for t in prange(n_threads):
+        counts = histograms[t]
+        for b in range(t, n_buckets, n_threads):
+            start, end = bucket_offsets[b], bucket_offsets[b + 1]
+            if end - start < 2:
+                continue
+            best = -1.0
+            for c in range(len(candidates)):
+                row = feedback_matrix[candidates[c]]
+                for j in range(start, end):
+                    counts[row[answer_indices[j]]] += 1
+                H, E_remain = _histogram_scores(counts, end - start)
+                if H > best:
+                    best = H
+                    entropies[b], expected_remaining[b] = H, E_remain
+                    if E_remain <= 1.0 + 1e-9:  # every answer told apart
+                        break
+
+    return entropies, expected_remaining
+
+@njit(parallel=True, nogil=True, cache=True)
+def _best_followup_letters_kernel(guess_letters, answer_letters, answer_indices, bucket_offsets, candidates,
+                                  n_patterns, n_threads):
+    """_best_followup_kernel with feedback computed from the letters."""
+    n_buckets = len(bucket_offsets) - 1
+    entropies = np.zeros(n_buckets, dtype=np.float64)
+    expected_remaining = np.ones(n_buckets, dtype=np.float64)
+
+    n_threads = min(n_threads, max(n_buckets, 1))
+    histograms = np.zeros((n_threads, n_patterns), dtype=np.int32)
+
+    for t in prange(n_threads):
+        counts = histograms[t]
+        answer_counts = np.zeros(256, dtype=np.int32)
+        for b in range(t, n_buckets, n_threads):
+            start, end = bucket_offsets[b], bucket_offsets[b + 1]
+            if end - start < 2:
+                continue
+            best = -1.0
+            for c in range(len(candidates)):
+                guess = guess_letters[candidates[c]]
+                for j in range(start, end):
+                    counts[_feedback_code(guess, answer_letters[answer_indices[j]], answer_counts)] += 1
+                H, E_remain = _histogram_scores(counts, end - start)
+                if H > best:
+                    best = H
+                    entropies[b], expected_remaining[b] = H, E_remain
+                    if E_remain <= 1.0 + 1e-9:
+                        break
+
+    return entropies, expected_remaining
+
+def compute_followup_metrics(context, answer_indices, bucket_offsets, candidates=None):
+    """Entropy and expected remaining of the best candidate guess (all guesses by default) for each bucket of answers."""
+    answer_indices, candidates = _kernel_indices(answer_indices, candidates, len(context.word_list))
+    bucket_offsets = np.ascontiguousarray(bucket_offsets, dtype=np.int64)
+    if context.feedback_matrix is None:
+        return _best_followup_letters_kernel(context.letters, context.answer_letters, answer_indices, bucket_offsets,
+                                             candidates, context.n_patterns, get_num_threads())
+    return _best_followup_kernel(context.feedback_matrix, answer_indices, bucket_offsets, candidates,
+                                 context.n_patterns, get_num_threads())
+
+class LookaheadScores:
+    """
+    Two-turn scores of a position's best one-step guesses: the guess's entropy
+    plus the expected entropy of the best follow-up over its feedback buckets,
+    and the answers expected to remain after that follow-up. `candidates`
+    holds only the guesses evaluated before the time budget ran out, and
+    `complete` says whether that was all of them.
+    """
+
+    def __init__(self, scores, candidates, entropies, expected_remaining, mode, complete):
+        self.scores = scores
+        self.candidates = candidates
+        self.entropies = entropies
+        self.expected_remaining = expected_remaining
+        self.mode = mode
+        self.complete = complete
+
+    def ranked(self):
+        """Positions in candidates, best two-turn entropy first; ties keep the one-step order."""
+        return np.argsort(-self.entropies, kind="stable")
+
+    def best(self):
+        """The best guess index, preferring a possible answer among equal ones, or None if nothing was evaluated."""
+        if len(self.candidates) == 0:
+            return None
+        top = np.flatnonzero(self.entropies >= self.entropies.max() - 1e-9)
+        viable = np.isin(self.candidates[top], self.scores.viable_guesses())
+        return self.candidates[top[np.argmax(viable)]]
+
+    def rows(self):
+        words = self.scores.context.words
+        return [
+            (str(words[g]), float(self.scores.entropies[g]), float(self.scores.expected_remaining[g]),
+             float(self.entropies[i]), float(self.expected_remaining[i]))
+            for i, g in ((i, self.candidates[i]) for i in self.ranked())
         ]
-    elif len(remaining) <= 2 and len(remaining) > 0:
-        filtered_results = [(w, float(e), float(er)) for (w, e, er) in results if w in remaining]
+
+def _sample_buckets(answers, offsets, max_size, rng):
+    """The buckets with at most max_size randomly chosen answers each, and their new offsets."""
+    keep = []
+    for start, end in zip(offsets[:-1], offsets[1:]):
+        if end - start > max_size:
+            keep.append(start + np.sort(rng.choice(end - start, max_size, replace=False)))
+        else:
+            keep.append(np.arange(start, end))
+    sampled_offsets = np.zeros(len(offsets), dtype=np.int64)
+    sampled_offsets[1:] = np.cumsum([len(k) for k in keep])
+    return answers[np.concatenate(keep)], sampled_offsets
+
+def lookahead_key(scores, candidates=None, k=LOOKAHEAD_CANDIDATES):
+    """The guesses lookahead_scores evaluates for these arguments, and their lookahead_cache key."""
+    top = scores.ranked("entropy", k, candidates)
+    return top, scores.context.lookahead_cache.key(scores.remaining, top)
+
+def lookahead_scores(scores, candidates=None, k=LOOKAHEAD_CANDIDATES, budget=None):
+    """
+    LookaheadScores of the top-k guesses by entropy (among candidates, if
+    given). Positions of up to LOOKAHEAD_EXACT_MAX_REMAINING answers try every
+    follow-up on every answer; larger ones use the sampled approximation. With
+    a budget in seconds, guesses are evaluated best-first until it runs out.
+    """
+    context = scores.context
+    remaining = scores.remaining
+    top, key = lookahead_key(scores, candidates, k)
+    exact = len(remaining) <= LOOKAHEAD_EXACT_MAX_REMAINING
+    mode = "exact" if exact else "sampled"
+
+    cache = context.lookahead_cache
+    cached = cache.get(key)
+    if cached is not None:
+        return LookaheadScores(scores, top, *cached, mode, True)
+
+    followups = None if exact else scores.ranked("entropy", LOOKAHEAD_FOLLOWUP_GUESSES)
+    deadline = None if budget is None else time.perf_counter() + budget
+    entropies, expected_remaining = [], []
+    with metrics.span("lookahead"):
+        for g_idx in top:
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            codes = context.feedback_codes(g_idx, remaining)
+            answers = remaining[np.argsort(codes, kind="stable")]
+            sizes = np.bincount(codes, minlength=context.n_patterns)
+            sizes = sizes[sizes > 0]
+            offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum(sizes)
+            sampled = sizes
+            if not exact:
+                answers, offsets = _sample_buckets(answers, offsets, LOOKAHEAD_SAMPLE_ANSWERS,
+                                                   np.random.default_rng(g_idx))
+                sampled = np.diff(offsets)
+
+            H, E_remain = compute_followup_metrics(context, answers, offsets, followups)
+            p = sizes / len(remaining)
+            entropies.append(scores.entropies[g_idx] + p @ H)
+            expected_remaining.append(p @ (E_remain * sizes / sampled))
+
+    entropies, expected_remaining = np.array(entropies), np.array(expected_remaining)
+    complete = len(entropies) == len(top)
+    if complete:
+        cache.put(key, entropies, expected_remaining)
+    return LookaheadScores(scores, top[:len(entropies)], entropies, expected_remaining, mode, complete)
+#endregion
+
+#region UI
+def best_guesses_for_state(state, candidates=None):
+    """
+    Score the position, optionally only for the given candidate guess indices
+    (e.g. viable answers or a shortlist of strong probes). With two or fewer
+    answers left only the viable answers can do best, so only they are scored.
+    """
+    if len(state) == 0:
+        return None
+
+    if candidates is None and len(state) <= 2:
+        viable = state.context.answer_guess_indices[state.remaining]
+        if np.any(viable >= 0):
+            candidates = np.sort(viable[viable >= 0])
+
+    context = state.context
+    cache = context.score_cache
+    key = cache.key(state.remaining, candidates)
+    cached = cache.get(key)
+    source = "cache"
+    first_turn = len(state) == len(context.answer_list)
+
+    if cached is None and candidates is None:
+        if context.opening_book is not None:
+            cached = context.opening_book.lookup(key)
+            source = "opening_book"
+        if cached is None and first_turn:
+            cached = load_no_history_cache(context)
+            source = "first_turn_file"
+        if cached is not None:
+            cache.put(key, *cached)
+
+    if cached is not None:
+        entropies, expected_remaining = cached
     else:
-        filtered_results = [(w, float(e), float(er)) for (w, e, er) in results]
+        source = "computed"
+        with metrics.span("score"):
+            entropies, expected_remaining = compute_metrics(context, state.remaining, candidates)
+        cache.put(key, entropies, expected_remaining)
 
-    remaining_set = set(remaining)
-    viable_results = [r for r in filtered_results if r[0] in remaining_set]
-    sorted_viable = sorted(viable_results, key=lambda x: x[1], reverse=True)
-    sorted_entropy = sorted(filtered_results, key=lambda x: x[1], reverse=True)
-    sorted_remaining = sorted(filtered_results, key=lambda x: x[2])
+    metrics.inc("wordle_scores_total", source=source)
+    metrics.observe("wordle_remaining_answers", len(state), buckets=metrics.SIZE_BUCKETS)
 
-    top_n = 10 
+    if candidates is not None:
+        return GuessScores.from_candidates(context, state.remaining, candidates, entropies, expected_remaining)
 
-    viable = sorted_viable[:20] 
+    scores = GuessScores(context, state.remaining, entropies, expected_remaining)
+    if cached is None and first_turn:
+        save_best_guesses(scores)
 
-    top_entropy = sorted_entropy[:top_n]
-    bot_entropy = sorted_entropy[-top_n:] if len(sorted_entropy) > top_n else sorted_entropy
+    return scores
 
-    top_remaining = sorted_remaining[:top_n]
-    bot_remaining = sorted_remaining[-top_n:] if len(sorted_remaining) > top_n else sorted_remaining
+def next_best_guesses(words, feedback_matrix, word_to_index, history):
+    state = GameState.from_history(_context_for(words, feedback_matrix, word_to_index), history)
+    return best_guesses_for_state(state)
+
+def load_options_sections(history):
+    return options_sections(best_guesses_for_state(GameState.from_history(get_context(), history)))
+
+def options_sections(scores):
+    """The /best_options sections for a scored position (None when no answer is left)."""
+    if scores is None:
+        return {"remaining_count": 0, "viable_answers": []}
+
+    n_remaining = len(scores.remaining)
+    if n_remaining > 2:
+        filtered = np.flatnonzero((scores.entropies > 0.0) & (scores.expected_remaining < n_remaining))
+    else:
+        filtered = scores.viable_guesses()
+
+    with metrics.span("rank"):
+        viable = np.intersect1d(filtered, scores.viable_guesses(), assume_unique=True)
+
+        top_n = 10
+
+        return {
+            "remaining_count": n_remaining,
+            "viable_answers": scores.rows(scores.ranked("entropy", 20, viable)),
+            "top_entropy": scores.rows(scores.ranked("entropy", top_n, filtered)),
+            "bot_entropy": scores.rows(scores.ranked("entropy", top_n, filtered, from_end=True)),
+            "top_remaining": scores.rows(scores.ranked("expected", top_n, filtered)),
+            "bot_remaining": scores.rows(scores.ranked("expected", top_n, filtered, from_end=True)),
+        }
+
+def lookahead_options(lookahead):
+    """The optional /best_options lookahead section for LookaheadScores (None when no answer is left)."""
+    if lookahead is None:
+        return {"lookahead": [], "lookahead_mode": None, "lookahead_complete": True}
+    return {"lookahead": lookahead.rows(), "lookahead_mode": lookahead.mode, "lookahead_complete": lookahead.complete}
+
+def load_full_options(history, offset=0, limit=None):
+    return full_options(best_guesses_for_state(GameState.from_history(get_context(), history)), offset, limit)
+
+def full_options(scores, offset=0, limit=None):
+    """
+    Viable answers and all guesses ranked by entropy, optionally only the
+    [offset, offset + limit) page of each list.
+    """
+    if scores is None:
+        return {"viable_answers": [], "viable_guesses": [], "total_answers": 0, "total_guesses": 0}
+
+    viable = scores.viable_guesses()
+    all_guesses = scores.scored_guesses()
+    k = len(all_guesses) if limit is None else offset + limit
+
+    def page(candidates):
+        ranked = scores.ranked("entropy", k, candidates)[offset:]
+        return [
+            {"word": w, "entropy": e, "expected": er, "index": offset + i}
+            for i, (w, e, er) in enumerate(scores.rows(ranked))
+        ]
+
+    with metrics.span("rank"):
+        viable_answers, viable_guesses = page(viable), page(all_guesses)
 
     return {
-        "remaining_count": len(remaining),
-        "viable_answers": viable,
-        "top_entropy": top_entropy,
-        "bot_entropy": bot_entropy,
-        "top_remaining": top_remaining,
-        "bot_remaining": bot_remaining,
+        "viable_answers": viable_answers,
+        "viable_guesses": viable_guesses,
+        "total_answers": len(viable),
+        "total_guesses": len(all_guesses),
+    }
+
+def guess_distributions(state, guess_indices):
+    """
+    Bucket sizes of each guess over the remaining answers, shape
+    (guesses, feedback patterns), from a single bincount over all guesses.
+    """
+    guess_indices = np.asarray(guess_indices, dtype=np.int64)
+    index = state.context.partition_index
+    full = len(state) == len(state.context.answer_list)
+    if index is not None and full and np.all(index.rows[guess_indices] >= 0):
+        return index.bucket_sizes(guess_indices)
+
+    n_patterns = state.context.n_patterns
+    codes = state.context.feedback_codes(guess_indices, state.remaining).astype(np.int64)
+    codes += np.arange(len(guess_indices), dtype=np.int64)[:, None] * n_patterns
+    return np.bincount(codes.ravel(), minlength=len(guess_indices) * n_patterns).reshape(-1, n_patterns)
+
+def _distribution_row(guess, counts, total):
+    codes = np.flatnonzero(counts)
+    sizes = counts[codes]
+    order = np.argsort(-sizes, kind="stable")
+    p = sizes / total
+    bucket_sizes, buckets = np.unique(sizes, return_counts=True)
+    return {
+        "guess": guess,
+        "total_remaining": total,
+        "expected_remaining": float(np.sum(p * sizes)),
+        "entropy": float(np.sum(p * np.log2(1.0 / p))),
+        "worst_case": int(sizes.max()),
+        "buckets": len(codes),
+        "patterns": [
+            {"pattern": decode_feedback(int(codes[i]), len(guess)), "size": int(sizes[i])} for i in order
+        ],
+        # bucket size -> number of answers that leave that many words
+        "distribution": {int(size): int(size * n) for size, n in zip(bucket_sizes, buckets)},
     }
 
 def load_distribution_data(guess, history):
-    words, feedback_matrix, word_to_index = load_feedback_data()
+    """
+    Feedback buckets of a guess (or a list of guesses, scored together) after
+    the history: every pattern with its size, entropy, expected remaining,
+    worst case and how many answers leave each bucket size.
+    """
+    context = get_context()
+    state = GameState.from_history(context, history)
+    guesses = [guess] if isinstance(guess, str) else list(guess)
+    N = len(state)
 
-    remaining = filter_words(words, feedback_matrix, word_to_index, history)
-    N = len(remaining)
     if N == 0:
-        return {"guess": guess, "total_remaining": 0, "expected_remaining": 0.0}
+        rows = [{"guess": g, "total_remaining": 0, "expected_remaining": 0.0} for g in guesses]
+    else:
+        counts = guess_distributions(state, [context.word_to_index[g] for g in guesses])
+        rows = [_distribution_row(g, row, N) for g, row in zip(guesses, counts)]
 
-    g_idx = word_to_index[guess]
-    remaining_indices = np.array([word_to_index[w] for w in remaining])
+    if isinstance(guess, str):
+        return rows[0]
+    return {"total_remaining": N, "guesses": rows}
 
-    fb_codes = feedback_matrix[g_idx, remaining_indices]
+#endregion
 
-    remaining_counts = np.zeros(N, dtype=np.int32)
-    for i, ans_idx in enumerate(remaining_indices):
-        fb_code = feedback_matrix[g_idx, ans_idx]
-        remaining_counts[i] = np.sum(fb_codes == fb_code)
+#region Analysis
+def _parse_history(context, history):
+    """(guess index, feedback code) pairs of a history, or a ValueError naming the bad move."""
+    moves = []
+    for guess, fb_str in history:
+        guess = guess.lower()
+        if guess not in context.word_to_index:
+            raise ValueError(f"'{guess}' is not a valid guess")
+        if len(fb_str) != len(guess) or any(c not in "BYG" for c in fb_str):
+            raise ValueError(f"invalid feedback '{fb_str}' for '{guess}'")
+        moves.append((context.word_to_index[guess], encode_feedback(fb_str)))
+    return moves
+
+def _analyze_chunk(context, games, score):
+    # every prefix of every game is a position; positions reached by several
+    # prefixes or games are narrowed and scored once
+    prefixes = {(): GameState(context)}
+    positions = {}  # score cache key -> (state, guess indices played there)
+    parsed = []
+    for history in games:
+        try:
+            moves = _parse_history(context, history)
+        except ValueError as error:
+            parsed.append((None, None, str(error)))
+            continue
+        except (AttributeError, TypeError):
+            parsed.append((None, None, "invalid history"))
+            continue
+
+        keys = []
+        for turn, (g_idx, code) in enumerate(moves):
+            prefix = tuple(moves[:turn])
+            state = prefixes[prefix]
+            if len(state) == 0:
+                break
+            key = context.score_cache.key(state.remaining)
+            positions.setdefault(key, (state, set()))[1].add(g_idx)
+            keys.append(key)
+            child = prefix + ((g_idx, code),)
+            if child not in prefixes:
+                prefixes[child] = state.clone().apply_code(g_idx, code)
+        parsed.append((moves, keys, None))
+
+    # keep only what the rows need, so full score arrays never pile up
+    graded = {}
+    for key, (state, played) in positions.items():
+        scores = score(state)
+        if scores is None:
+            graded[key] = None
+            continue
+        best = int(scores.ranked("entropy", 1)[0])
+        played = np.array(sorted(played), dtype=np.int32)
+        entropies = scores.entropies[played]
+        expected = scores.expected_remaining[played]
+        missing = np.isnan(entropies)
+        if np.any(missing):
+            # small positions are only scored for the viable answers
+            counts = guess_distributions(state, played[missing])
+            p = counts / len(state)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                entropies[missing] = np.nansum(p * np.log2(1.0 / p), axis=1)
+            expected[missing] = np.sum(p * counts, axis=1)
+        graded[key] = (
+            best, float(scores.entropies[best]),
+            {int(g): (float(e), float(er)) for g, e, er in zip(played, entropies, expected)},
+        )
+
+    for moves, keys, error in parsed:
+        if error is not None:
+            yield {"error": error}
+            continue
+        if any(graded[key] is None for key in keys):
+            yield {"error": "position could not be scored"}
+            continue
+
+        turns = []
+        state_size = len(context.answer_list)
+        for turn, ((g_idx, code), key) in enumerate(zip(moves, keys)):
+            best, best_entropy, played = graded[key]
+            entropy, expected = played[g_idx]
+            remaining_after = len(prefixes[tuple(moves[:turn + 1])])
+            turns.append({
+                "turn": turn + 1,
+                "guess": context.word_list[g_idx],
+                "feedback": decode_feedback(code, len(context.word_list[g_idx])),
+                "remaining": state_size,
+                "remaining_after": remaining_after,
+                "entropy": entropy,
+                "expected_remaining": expected,
+                "best_guess": context.word_list[best],
+                "best_entropy": best_entropy,
+                "information_lost": best_entropy - entropy,
+                "information_gained": float(np.log2(state_size / remaining_after)) if remaining_after else None,
+            })
+            state_size = remaining_after
+        row = {"turns": turns}
+        if len(keys) < len(moves):
+            row["error"] = f"no answer is left after turn {len(keys)}"
+        yield row
+
+def analyze_histories(histories, context=None, batch_size=ANALYSIS_BATCH_SIZE, score=None):
+    """
+    Grade many games at once. For each history of (guess, feedback) pairs yields
+    a dict with one row per turn: the remaining count before and after, the
+    played guess's entropy and expected remaining, and the best available
+    guess and entropy. Games are read `batch_size` at a time; inside a batch
+    each distinct position is scored once, with `score` (best_guesses_for_state
+    by default). `score` may return None for a position it could not score;
+    games reaching it get an error row. Results come out in input order.
+    """
+    context = context or get_context()
+    score = score or best_guesses_for_state
+    games = iter(histories)
+    index = 0
+    while True:
+        chunk = list(itertools.islice(games, batch_size))
+        if not chunk:
+            return
+        for row in _analyze_chunk(context, chunk, score):
+            row["game"] = index
+            index += 1
+            yield row
+#endregion
 
-    expected_remaining = float(np.mean(remaining_counts))
+#region MultiBoard
+BOARD_GUESSES = {1: 6, 2: 7, 4: 9, 8: 13}  # guesses allowed: Wordle, Dordle, Quordle, Octordle
+MULTI_BOARD_SOLVE_BONUS = 1.0  # bits of entropy a guess is worth per board it is expected to solve outright
+
+def board_guesses(boards):
+    return BOARD_GUESSES.get(boards, boards + 5)
+
+class MultiGameState:
+    """
+    One game played on several boards at once (Quordle, Octordle): a GameState
+    per board, all narrowed by the same guesses. A board drops out once its
+    answer is found.
+    """
+
+    def __init__(self, context, boards=4):
+        self.context = context
+        self.boards = [GameState(context) for _ in range(boards)]
+        self.solved = [False] * boards
+        self.history = []
+
+    @classmethod
+    def from_history(cls, context, history, boards=None):
+        """`history` holds (guess, [feedback of each board]) pairs; `boards` defaults to their length, or 4."""
+        state = cls(context, boards or (len(history[0][1]) if history else 4))
+        for guess, feedbacks in history:
+            state.apply(guess, feedbacks)
+        return state
+
+    def apply(self, guess, feedbacks):
+        if len(feedbacks) != len(self.boards):
+            raise ValueError(f"Expected feedback for {len(self.boards)} boards, got {len(feedbacks)}")
+        for b, fb_str in enumerate(feedbacks):
+            if not self.solved[b]:
+                self.boards[b].apply(guess, fb_str)
+                self.solved[b] = fb_str == "G" * len(guess)
+        self.history.append((guess, list(feedbacks)))
+        return self
+
+    def open_boards(self):
+        return [state for state, solved in zip(self.boards, self.solved) if not solved]
+
+    def key(self):
+        """ScoreCache-style key of the open boards' remaining answers, for sharing their scoring."""
+        open_boards = self.open_boards()
+        remaining = np.concatenate([board.remaining for board in open_boards])
+        return "boards:" + self.context.score_cache.key(remaining, [len(board) for board in open_boards])
+
+    @property
+    def done(self):
+        return all(self.solved)
+
+@njit(parallel=True, nogil=True, cache=True)
+def _score_boards_kernel(feedback_matrix, remaining_indices, board_offsets, candidates, n_patterns, n_threads):
+    """
+    _score_candidates_kernel over several boards in one pass: board b's answers
+    are remaining_indices[board_offsets[b]:board_offsets[b + 1]], and each
+    candidate's entropy and expected remaining are summed over the boards.
+    """
+    n_candidates = len(candidates)
+    n_boards = len(board_offsets) - 1
+    entropies = np.zeros(n_candidates, dtype=np.float64)
+    expected_remaining = np.zeros(n_candidates, dtype=np.float64)
+
+    n_threads = min(n_threads, max(n_candidates, 1))
+    histograms = np.zeros((n_threads, n_patterns), dtype=np.int32)
+    chunk = (n_candidates + n_threads - 1) // n_threads
+
+    for t in prange(n_threads):
+        counts = histograms[t]
+        for c in range(t * chunk, min((t + 1) * chunk, n_candidates)):
+            row = feedback_matrix[candidates[c]]
+            for b in range(n_boards):
+                for j in range(board_offsets[b], board_offsets[b + 1]):
+                    counts[row[remaining_indices[j]]] += 1
+                H, E_remain = _histogram_scores(counts, board_offsets[b + 1] - board_offsets[b])
+                entropies[c] += H
+                expected_remaining[c] += E_remain
 
-    unique_counts, occurrences = np.unique(remaining_counts, return_counts=True)
-    print(list(zip(unique_counts, occurrences)))
-    distribution = {
-        int(count): int(occ) for count, occ in zip(unique_counts, occurrences)
-    }
+    return entropies, expected_remaining
 
-    return {
-        "guess": guess,
-        "total_remaining": N,
-        "expected_remaining": expected_remaining,
-        "distribution": distribution
-    }
+@njit(parallel=True, nogil=True, cache=True)
+def _score_boards_letters_kernel(guess_letters, answer_letters, remaining_indices, board_offsets, candidates,
+                                 n_patterns, n_threads):
+    """_score_boards_kernel with feedback computed from the letters."""
+    n_candidates = len(candidates)
+    n_boards = len(board_offsets) - 1
+    entropies = np.zeros(n_candidates, dtype=np.float64)
+    expected_remaining = np.zeros(n_candidates, dtype=np.float64)
+
+    n_threads = min(n_threads, max(n_candidates, 1))
+    histograms = np.zeros((n_threads, n_patterns), dtype=np.int32)
+    chunk = (n_candidates + n_threads - 1) // n_threads
+
+    for t in prange(n_threads):
+        counts = histograms[t]
+        answer_counts = np.zeros(256, dtype=np.int32)
+        for c in range(t * chunk, min((t + 1) * chunk, n_candidates)):
+            guess = guess_letters[candidates[c]]
+            for b in range(n_boards):
+                for j in range(board_offsets[b], board_offsets[b + 1]):
+                    counts[_feedback_code(guess, answer_letters[remaining_indices[j]], answer_counts)] += 1
+                H, E_remain = _histogram_scores(counts, board_offsets[b + 1] - board_offsets[b])
+                entropies[c] += H
+                expected_remaining[c] += E_remain
+
+    return entropies, expected_remaining
 
+def compute_board_metrics(context, boards_remaining, candidates=None):
+    """Summed entropy and expected remaining of each candidate guess over the boards' remaining answers."""
+    remaining_indices = np.concatenate(boards_remaining)
+    board_offsets = np.zeros(len(boards_remaining) + 1, dtype=np.int64)
+    board_offsets[1:] = np.cumsum([len(r) for r in boards_remaining])
+    remaining_indices, candidates = _kernel_indices(remaining_indices, candidates, len(context.word_list))
+    if context.feedback_matrix is None:
+        return _score_boards_letters_kernel(context.letters, context.answer_letters, remaining_indices, board_offsets,
+                                            candidates, context.n_patterns, get_num_threads())
+    return _score_boards_kernel(context.feedback_matrix, remaining_indices, board_offsets, candidates,
+                                context.n_patterns, get_num_threads())
+
+class BoardScores:
+    """
+    Scores of every guess for a multi-board position: entropy and expected
+    remaining summed over the open boards, and solve_chance, the expected
+    number of boards the guess solves outright.
+    """
+
+    def __init__(self, context, entropies, expected_remaining, solve_chance):
+        self.context = context
+        self.entropies = entropies
+        self.expected_remaining = expected_remaining
+        self.solve_chance = solve_chance
+
+    def priority(self, strategy="entropy"):
+        """Higher is better: entropy plus a bonus per expected solved board, or the negated expected remaining."""
+        if strategy == "entropy":
+            return self.entropies + MULTI_BOARD_SOLVE_BONUS * self.solve_chance
+        if strategy == "min_expected":
+            return self.solve_chance - self.expected_remaining
+        raise ValueError(f"Unknown multi-board strategy '{strategy}'")
+
+    def ranked(self, strategy="entropy", k=10):
+        return select_k(-self.priority(strategy), k)
+
+    def rows(self, indices):
+        words = self.context.words
+        return [(str(words[i]), float(self.entropies[i]), float(self.expected_remaining[i]), float(self.solve_chance[i]))
+                for i in indices]
+
+def best_board_guesses(state):
+    """BoardScores of a MultiGameState, or None once every board is solved."""
+    open_boards = state.open_boards()
+    if not open_boards:
+        return None
+    context = state.context
+
+    solve_chance = np.zeros(len(context.word_list))
+    for board in open_boards:
+        viable = context.answer_guess_indices[board.remaining]
+        if len(board):
+            np.add.at(solve_chance, viable[viable >= 0], 1.0 / len(board))
+
+    if all(len(board) == len(context.answer_list) for board in open_boards):
+        # every open board is still at the start: one board's (cached) scores times the board count
+        scores = best_guesses_for_state(open_boards[0])
+        return BoardScores(context, scores.entropies * len(open_boards), scores.expected_remaining * len(open_boards),
+                           solve_chance)
+
+    with metrics.span("score_boards"):
+        entropies, expected_remaining = compute_board_metrics(context, [board.remaining for board in open_boards])
+    return BoardScores(context, entropies, expected_remaining, solve_chance)
+
+def choose_board_guess(state, scores, strategy="entropy"):
+    """A board down to one answer is finished first; otherwise the best guess by the strategy's priority."""
+    for board in state.open_boards():
+        if len(board) == 1 and state.context.answer_guess_indices[board.remaining[0]] >= 0:
+            return state.context.answer_list[board.remaining[0]]
+    return state.context.word_list[scores.ranked(strategy, 1)[0]]
+
+def simulate_multi_board(answers, context, max_guesses=None, strategy="entropy", first_guess=None):
+    """
+    Play one game with one answer per board. Returns (guesses taken, solved,
+    history) like simulate_one_answer; solved means every board, and each
+    history entry holds the feedback of every board.
+    """
+    state = MultiGameState(context, len(answers))
+    max_guesses = max_guesses or board_guesses(len(answers))
+    guess = first_guess or choose_board_guess(state, best_board_guesses(state), strategy)
+
+    for turn in range(1, max_guesses + 1):
+        state.apply(guess, [get_and_decode_feedback(guess, answer) for answer in answers])
+        if state.done:
+            return turn, True, state.history
+        if any(len(board) == 0 for board in state.boards):
+            return None, False, state.history
+        if turn == max_guesses:
+            break
+        guess = choose_board_guess(state, best_board_guesses(state), strategy)
+
+    return None, False, state.history
+
+def multi_board_options(state, scores, k=10, strategy="entropy"):
+    """Each board's remaining count, the guess to play and the top-k guesses of a scored multi-board position."""
+    result = {
+        "boards": [{"remaining": len(board), "solved": solved} for board, solved in zip(state.boards, state.solved)],
+        "best_guess": None,
+        "top": [],
+    }
+    if scores is not None:
+        result["best_guess"] = choose_board_guess(state, scores, strategy)
+        result["top"] = scores.rows(scores.ranked(strategy, k))
+    return result
+
+def multi_board_games(answers, boards, seed=0):
+    """Deal the answers, shuffled with `seed`, into games of `boards` answers; leftover answers are not played."""
+    answers = list(answers)
+    random.Random(seed).shuffle(answers)
+    return [tuple(answers[i:i + boards]) for i in range(0, len(answers) - boards + 1, boards)]
+
+def _simulate_boards_chunk(args):
+    games, answer_sets, max_guesses, strategy, first_guess = args
+    context = _global_data['context']
+    results = []
+    for game, answers in zip(games, answer_sets):
+        turn, solved, history = simulate_multi_board(answers, context, max_guesses, strategy, first_guess)
+        results.append((game, answers, turn, solved, history))
+    return results
+
+def simulate_boards_pool(context, answer_sets, max_guesses=None, strategy="entropy", first_guess=None, workers=None):
+    """Play multi-board games across a process pool, yielding results as chunks complete."""
+    workers = workers or default_workers()
+    games = list(range(len(answer_sets)))
+    target = max(1, len(games) // (workers * 8))
+    tasks = [
+        (chunk, [answer_sets[game] for game in chunk], max_guesses, strategy, first_guess)
+        for chunk in _chunked(games, [1] * len(games), target)
+    ]
+    with SharedContext(context) as shared:
+        yield from _run_pool(shared, tasks, workers, _simulate_boards_chunk)
 #endregion
 
 #region Simulation
-def choose_guess_from_results(results, remaining_set, strategy="entropy"):
+def choose_guess_from_results(scores, strategy="entropy"):
+    words = scores.context.words
+    viable = scores.viable_guesses()
     if strategy == "random_viable":
-        viable = [r[0] for r in results if r[0] in remaining_set]
-        return random.choice(viable)
+        return words[random.choice(viable)]
 
-    few_left = len(remaining_set) <= 2
+    few_left = len(scores.remaining) <= 2
 
     if "viable" in strategy or few_left:
-        cand = [r for r in results if r[0] in remaining_set]
+        cand = viable
     else:
-        cand = results
+        cand = scores.scored_guesses()
 
-    if not cand:
-        return random.choice(list(remaining_set))
+    if len(cand) == 0:
+        return random.choice(scores.remaining_words().tolist())
 
-    if "entropy" in strategy:
-        best = max(cand, key=lambda r: r[1])
-        return best[0]
+    if "lookahead" in strategy:
+        return words[lookahead_scores(scores, cand).best()]
+    elif "entropy" in strategy:
+        return words[cand[np.argmax(scores.entropies[cand])]]
     elif "min_expected" in strategy or "expected" in strategy:
-        best = min(cand, key=lambda r: r[2])
-        return best[0]
+        return words[cand[np.argmin(scores.expected_remaining[cand])]]
     else:
-        return max(cand, key=lambda r: r[1])[0]
-
-def simulate_one_answer(answer, words, feedback_matrix, word_to_index, max_guesses=6, strategy="entropy", first_guess=None):
-    history = []
-    remaining = np.array(words)  
-    remaining_set = set(remaining.tolist())
+        return words[cand[np.argmax(scores.entropies[cand])]]
+
+def simulate_one_answer(answer, context, max_guesses=6, strategy="entropy", first_guess=None, timings=None):
+    """
+    Play one game. If `timings` is a list, the seconds spent choosing each
+    guess are appended to it as (turn, seconds) pairs.
+    """
+    state = GameState(context)
+
+    def choose(turn, strategy):
+        started = time.perf_counter()
+        guess = choose_guess_from_results(best_guesses_for_state(state), strategy=strategy)
+        if timings is not None:
+            timings.append((turn, time.perf_counter() - started))
+        return guess
 
     if first_guess is not None:
         guess = first_guess
     else:
-        _, results = next_best_guesses(words, feedback_matrix, word_to_index, history)
-        guess = choose_guess_from_results(results, remaining_set, strategy=("viable_entropy" if "viable" in strategy else "entropy"))
+        guess = choose(1, "viable_entropy" if "viable" in strategy else "entropy")
 
     for turn in range(1, max_guesses + 1):
         fb_str = get_and_decode_feedback(guess, answer)
-        history.append((guess, fb_str))
-        if fb_str == "GGGGG":
-            return turn, True, history
-
-        remaining = filter_words(words, feedback_matrix, word_to_index, history)
-        remaining_set = set(remaining.tolist())
-        if len(remaining) == 0:
-            return None, False, history
-
-        _, results = next_best_guesses(words, feedback_matrix, word_to_index, history)
-        guess = choose_guess_from_results(results, remaining_set, strategy=strategy)
-
-    return None, False, history
+        state.apply(guess, fb_str)
+        if fb_str == "G" * len(answer):
+            return turn, True, state.history
+
+        if len(state) == 0:
+            return None, False, state.history
+
+        if turn == max_guesses:
+            break
+        guess = choose(turn + 1, strategy)
+
+    return None, False, state.history
+
+def _group_guesses(state, games, turn, strategy, first_guess):
+    """Pick the next guess for a group of games sharing one position, as (guess index, games) pairs."""
+    word_to_index = state.context.word_to_index
+    if turn == 0:
+        if first_guess is not None:
+            return [(word_to_index[first_guess], games)]
+        strategy = "viable_entropy" if "viable" in strategy else "entropy"
+
+    scores = best_guesses_for_state(state)
+    if strategy != "random_viable":
+        return [(word_to_index[choose_guess_from_results(scores, strategy=strategy)], games)]
+
+    picks = np.array([word_to_index[choose_guess_from_results(scores, strategy=strategy)] for _ in games])
+    return [(g_idx, games[picks == g_idx]) for g_idx in np.unique(picks)]
+
+def _play_turn(context, answers_to_simulate, answer_indices, state, games, turn, strategy, first_guess):
+    """Play one turn for a group of games. Returns (finished games, groups still playing)."""
+    finished = []
+    next_groups = []
+    for g_idx, players in _group_guesses(state, games, turn, strategy, first_guess):
+        codes = context.feedback_codes(g_idx, answer_indices[players])
+        win_code = 3 ** len(context.word_list[g_idx]) - 1
+
+        for code in np.unique(codes):
+            group = players[codes == code]
+            child = state.clone().apply_code(g_idx, code)
+            if code == win_code:
+                finished.extend((game, answers_to_simulate[game], turn + 1, True, child.history) for game in group)
+            elif len(child) == 0:
+                finished.extend((game, answers_to_simulate[game], None, False, child.history) for game in group)
+            else:
+                next_groups.append((child, group))
+    return finished, next_groups
+
+def simulate_batch(context, answers_to_simulate, max_guesses=6, strategy="entropy", first_guess=None,
+                   groups=None, start_turn=0):
+    """
+    Play all games in lock-step. Games that share a position are grouped, each
+    group is scored once per turn (distinct groups reaching the same remaining
+    set share the ScoreCache entry), and a group is split by the feedback codes
+    read from the matrix for its answers.
+
+    Yields (game number, answer, guesses_taken, solved, history) as games finish.
+    """
+    answer_indices = np.array([context.answer_to_index[a] for a in answers_to_simulate], dtype=np.int32)
+    if groups is None:
+        groups = [(GameState(context), np.arange(len(answer_indices)))]
+
+    for turn in range(start_turn, max_guesses):
+        next_groups = []
+        for state, games in groups:
+            finished, children = _play_turn(context, answers_to_simulate, answer_indices, state, games, turn, strategy, first_guess)
+            yield from finished
+            next_groups.extend(children)
+        groups = next_groups
+
+    for state, games in groups:
+        for game in games:
+            yield game, answers_to_simulate[game], None, False, state.history
 
 # MULTI PROCESS HELPERS 
 _global_data = {}
 
-def init_worker(words_path, feedback_matrix_path, word_to_index_path):
-    global _global_data
+class SharedContext:
+    """
+    Makes a context's arrays available to pool workers without copying them per
+    process: a file-backed matrix is re-mapped from the same file (one page-cache
+    copy), any other matrix and the word arrays go into shared memory blocks.
+    Use as a context manager; the blocks are unlinked on exit.
+    """
+
+    def __init__(self, context, threads_per_worker=1):
+        self._blocks = []
+        matrix = context.feedback_matrix
+        if matrix is None:
+            matrix_spec = None
+        elif isinstance(matrix, np.memmap) and matrix.filename is not None:
+            matrix_spec = ("mmap", matrix.filename, matrix.offset, matrix.shape, matrix.dtype.str)
+        else:
+            matrix_spec = self._share(np.ascontiguousarray(matrix))
+
+        self.spec = {
+            "matrix": matrix_spec,
+            "words": self._share(context.words),
+            "answers": None if context.answer_list is context.word_list else self._share(context.answers),
+            "save_dir": context.save_dir,
+            "opening_book": context.opening_book.path if context.opening_book is not None else None,
+            "partition_index": context.partition_index.path if context.partition_index is not None else None,
+            "threads": threads_per_worker,
+        }
+
+    def _share(self, array):
+        from multiprocessing import shared_memory
+
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        self._blocks.append(block)
+        return ("shm", block.name, array.shape, array.dtype.str)
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _attach_array(spec):
+    if spec[0] == "mmap":
+        _, filename, offset, shape, dtype = spec
+        return np.memmap(filename, dtype=np.dtype(dtype), mode="r", offset=offset, shape=tuple(shape))
+
+    from multiprocessing import shared_memory
+
+    _, name, shape, dtype = spec
+    block = shared_memory.SharedMemory(name=name)
+    _global_data.setdefault("blocks", []).append(block)
+    return np.ndarray(tuple(shape), dtype=np.dtype(dtype), buffer=block.buf)
+
+def init_worker(spec):
+    """Pool initializer: attach to the arrays of a SharedContext spec."""
+    from numba import set_num_threads
+    set_num_threads(spec["threads"])
+
+    words = _attach_array(spec["words"]).tolist()
+    answers = _attach_array(spec["answers"]).tolist() if spec["answers"] is not None else None
+    matrix = _attach_array(spec["matrix"]) if spec["matrix"] is not None else None
+    context = SolverContext(words, matrix, save_dir=spec["save_dir"], answers=answers)
+    if spec["opening_book"] is not None:
+        context.opening_book = OpeningBook.load(spec["opening_book"], context)
+    if spec["partition_index"] is not None:
+        context.partition_index = PartitionIndex.load(spec["partition_index"], context)
+    _global_data['context'] = context
+
+def default_workers():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
 
-    with open(words_path, "r", encoding="utf8") as f:
-        words = [w.strip() for w in f if w.strip()]
+def _simulate_answers_chunk(args):
+    games, answers, max_guesses, strategy, first_guess = args
+    context = _global_data['context']
+    results = []
+    for game, answer in zip(games, answers):
+        turn, solved, history = simulate_one_answer(answer, context, max_guesses=max_guesses,
+                                                    strategy=strategy, first_guess=first_guess)
+        results.append((game, answer, turn, solved, history))
+    return results
+
+def _simulate_groups_chunk(args):
+    groups, max_guesses, strategy, first_guess, start_turn = args
+    context = _global_data['context']
+    results = []
+    for games, answers, remaining, history in groups:
+        start = [(GameState(context, remaining, history), np.arange(len(games)))]
+        for local, answer, turn, solved, game_history in simulate_batch(
+                context, answers, max_guesses, strategy, first_guess, groups=start, start_turn=start_turn):
+            results.append((int(games[local]), answer, turn, solved, game_history))
+    return results
+
+def _chunked(items, sizes, target):
+    """Split items into consecutive chunks whose sizes add up to about `target` each."""
+    chunk, total = [], 0
+    for item, size in zip(items, sizes):
+        chunk.append(item)
+        total += size
+        if total >= target:
+            yield chunk
+            chunk, total = [], 0
+    if chunk:
+        yield chunk
+
+def _run_pool(shared, tasks, workers, fn):
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(shared.spec,)) as executor:
+        # a finished chunk's results are dropped once yielded instead of staying referenced until the pool exits
+        pending = {executor.submit(fn, task) for task in tasks}
+        for future in as_completed(pending):
+            pending.discard(future)
+            yield from future.result()
+
+def simulate_pool(context, answers_to_simulate, max_guesses=6, strategy="entropy", first_guess=None, workers=None):
+    """Play every game on its own across a process pool, yielding results as chunks complete."""
+    workers = workers or default_workers()
+    games = list(range(len(answers_to_simulate)))
+    target = max(1, len(games) // (workers * 8))
+    tasks = [
+        ([game for game in chunk], [answers_to_simulate[game] for game in chunk], max_guesses, strategy, first_guess)
+        for chunk in _chunked(games, [1] * len(games), target)
+    ]
+    with SharedContext(context) as shared:
+        yield from _run_pool(shared, tasks, workers, _simulate_answers_chunk)
+
+def simulate_batch_parallel(context, answers_to_simulate, max_guesses=6, strategy="entropy", first_guess=None, workers=None):
+    """
+    Lock-step simulation across a process pool. Turn one is shared by every game,
+    so it is played here; the resulting feedback groups are independent and are
+    sent to the workers largest first, small groups packed together into chunks.
+    """
+    workers = workers or default_workers()
+    answer_indices = np.array([context.answer_to_index[a] for a in answers_to_simulate], dtype=np.int32)
+    finished, groups = _play_turn(context, answers_to_simulate, answer_indices, GameState(context),
+                                  np.arange(len(answer_indices)), 0, strategy, first_guess)
+    yield from finished
+    if max_guesses <= 1:
+        for state, games in groups:
+            for game in games:
+                yield game, answers_to_simulate[game], None, False, state.history
+        return
+
+    groups.sort(key=lambda group: -len(group[1]))
+    payload = [
+        (games, [answers_to_simulate[game] for game in games], state.remaining, state.history)
+        for state, games in groups
+    ]
+    target = max(1, len(answers_to_simulate) // (workers * 4))
+    tasks = [
+        (chunk, max_guesses, strategy, first_guess, 1)
+        for chunk in _chunked(payload, [len(games) for games, *_ in payload], target)
+    ]
+    with SharedContext(context) as shared:
+        yield from _run_pool(shared, tasks, workers, _simulate_groups_chunk)
+
+def _simulation_run_key(context, answers_to_simulate, strategy, max_guesses, first_guess, boards=1):
+    key = {
+        "version": context.version,
+        "answers_hash": vocabulary_hash(answers_to_simulate),
+        "strategy": strategy,
+        "max_guesses": max_guesses,
+        "first_guess": first_guess,
+    }
+    if boards > 1:
+        key["boards"] = boards
+    return key
+
+def _write_simulation_progress(progress_path, run_key, offset, elapsed, start_ts):
+    tmp_path = f"{progress_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({**run_key, "offset": offset, "elapsed_seconds": elapsed, "start_ts": start_ts}, f)
+    os.replace(tmp_path, progress_path)
+
+def _resume_simulation(csv_path, progress_path, run_key):
+    """
+    Cut the CSV back to the last checkpoint of an interrupted run with the same
+    settings. Returns (answers already written, checkpoint) or None.
+    """
+    if not (os.path.exists(csv_path) and os.path.exists(progress_path)):
+        return None
+    with open(progress_path, "r") as f:
+        progress = json.load(f)
+    if any(progress.get(k) != v for k, v in run_key.items()):
+        print(f"Ignoring checkpoint '{progress_path}': it was written for different settings")
+        return None
 
-    with open(word_to_index_path, "r", encoding="utf8") as f:
-        word_to_index = json.load(f)
+    with open(csv_path, "r+", newline="", encoding="utf8") as f:
+        f.truncate(progress["offset"])
+        f.seek(0)
+        done = {row["answer"] for row in csv.DictReader(f)}
+    return done, progress
+
+def simulation_run_name(strategy, first_guess=None, boards=1):
+    name = f"simulation_{strategy}_{'withfirst' if first_guess else 'nofirst'}"
+    return f"{name}_{boards}boards" if boards > 1 else name
+
+def read_simulation_csv(csv_path, context, boards=1):
+    """
+    Per-answer CSV rows as columns: answer indices, guesses taken (-1 for a
+    fail), solved flags and the histories packed as guess indices and feedback
+    codes, game i owning history_guesses[history_offsets[i]:history_offsets[i + 1]].
+    Multi-board runs ("+"-joined answers and feedback) get one answer and
+    feedback code column per board.
+    """
+    answers, guesses_taken, solved = [], [], []
+    offsets, guesses, codes = [0], [], []
+    with open(csv_path, newline="", encoding="utf8") as f:
+        for row in csv.DictReader(f):
+            board_answers = [context.answer_to_index[a] for a in row["answer"].split("+")]
+            answers.append(board_answers if boards > 1 else board_answers[0])
+            guesses_taken.append(int(row["guesses_taken"]))
+            solved.append(row["solved"] == "True")
+            for step in filter(None, row["history"].split(" | ")):
+                word, fb = step.split(":")
+                guesses.append(context.word_to_index[word])
+                board_codes = [encode_feedback(f) for f in fb.split("+")]
+                codes.append(board_codes if boards > 1 else board_codes[0])
+            offsets.append(len(guesses))
 
-    feedback_matrix = np.load(feedback_matrix_path, mmap_mode="r")
+    return {
+        "answers": np.array(answers, dtype=np.int32).reshape(len(answers), -1) if boards > 1 else
+                   np.array(answers, dtype=np.int32),
+        "guesses_taken": np.array(guesses_taken, dtype=np.int8),
+        "solved": np.array(solved, dtype=bool),
+        "history_offsets": np.array(offsets, dtype=np.int32),
+        "history_guesses": np.array(guesses, dtype=np.int32),
+        "history_codes": np.array(codes, dtype=feedback_dtype(context.word_length)).reshape(len(codes), -1)
+                         if boards > 1 else np.array(codes, dtype=feedback_dtype(context.word_length)),
+    }
 
-    _global_data['words'] = words
-    _global_data['feedback_matrix'] = feedback_matrix
-    _global_data['word_to_index'] = word_to_index
+def summarize_simulation(columns, strategy, first_guess, max_guesses, elapsed, start_ts, boards=1):
+    attempts = np.where(columns["solved"], columns["guesses_taken"], max_guesses + 1)  # fails count as max_guesses+1
+    wins_only = attempts[columns["solved"]]
+    total_games = len(attempts)
+    wins = len(wins_only)
 
-def simulate_one_answer_wrapper(args):
-    answer, max_guesses, strategy, first_guess = args
-    data = _global_data
-    turn, solved,history =  simulate_one_answer(
-        answer,
-        data['words'],
-        data['feedback_matrix'],
-        data['word_to_index'],
-        max_guesses=max_guesses,
-        strategy=strategy,
-        first_guess=first_guess
-    )
-    return answer, turn, solved, history
+    rounds, counts = np.unique(wins_only, return_counts=True)
+    rounds_distribution = {int(r): int(c) for r, c in zip(rounds, counts)}
+    if wins < total_games:
+        rounds_distribution["fail"] = total_games - wins
+
+    summary = {
+        "elapsed_seconds": elapsed,
+        "strategy": strategy,
+        "first_guess": first_guess,
+        "total_games": total_games,
+        "wins": int(wins),
+        "fails": int(total_games - wins),
+        "win_rate": wins / total_games if total_games else float("nan"),
+        "mean_rounds_win_only": float(np.mean(wins_only)) if wins > 0 else float("nan"),
+        "median_rounds_win_only": float(np.median(wins_only)) if wins > 0 else float("nan"),
+        "mean_rounds_including_fails": float(np.mean(attempts)) if total_games else float("nan"),
+        "rounds_distribution": rounds_distribution,
+        "start_ts": start_ts,
+    }
+    if boards > 1:
+        summary["boards"] = boards
+    return summary
+
+def save_simulation_run(path, context, columns, summary):
+    """Columnar copy of a finished run, with its summary stored as JSON so it loads without pickle."""
+    np.savez(path, version=np.array(context.version), summary=np.array(json.dumps(summary)), **columns)
 
-def simulate_all_answers(words, feedback_matrix, word_to_index,
+def simulate_all_answers(context,
                          strategy="entropy",
-                         max_guesses=6,
+                         max_guesses=None,
                          answers_to_simulate=None,
                          first_guess=None,
                          save_dir=SIMULATION_SAVE_DIR,
-                         parallel=True):
+                         parallel=True,
+                         batched=True,
+                         workers=None,
+                         resume=True,
+                         boards=1):
+    """
+    Simulate every answer and save the per-answer CSV, plus a columnar copy
+    with the summary once the run is finished (see SimulationRun). The batched
+    engine plays games in lock-step; with batched=False each game is played on
+    its own. With parallel set, the work is spread over `workers` processes
+    (all cores by default) that share the context's arrays.
+
+    With boards > 1 the answers are dealt into multi-board games (see
+    multi_board_games) played with simulate_multi_board, never batched.
+    max_guesses defaults to board_guesses(boards), 6 for a single board.
+
+    Rows are appended to the CSV as games finish (in completion order) and the
+    position reached is checkpointed in "<csv>.progress". An interrupted run
+    resumes from its last checkpoint when called again with the same settings.
+    """
+    from tqdm import tqdm
+
     os.makedirs(save_dir, exist_ok=True)
 
     if answers_to_simulate is None:
-        answers_to_simulate = words
-
-    feedback_matrix_path = os.path.join("data", "feedback_matrix.npy")
-    words_path = os.path.join("data", "words.txt")
-    word_to_index_path = os.path.join("data", "word_to_index.json")
-    
-    if not os.path.exists(word_to_index_path):
-        import json
-        with open(word_to_index_path, "w", encoding="utf8") as f:
-            json.dump(word_to_index, f)
-
-    assert os.path.exists(feedback_matrix_path), "feedback_matrix .npy not found"
-
-    total_games = len(answers_to_simulate)
-    start_ts = datetime.datetime.now()
-    feedback_matrix = np.ascontiguousarray(feedback_matrix)
-
-    results = []
-    if parallel:
-        num_workers = max(1, min(multiprocessing.cpu_count() - 1, 8))  
-        with ProcessPoolExecutor(
-            max_workers=num_workers,
-            initializer=init_worker,
-            initargs=(words_path, feedback_matrix_path, word_to_index_path)
-        ) as executor:
-            task_args = [(ans, max_guesses, strategy, first_guess) for ans in answers_to_simulate]
-            for res in tqdm(executor.map(simulate_one_answer_wrapper, task_args),
-                            total=total_games, desc="Simulating", ncols=100):
-                results.append(res)
-
+        answers_to_simulate = context.answer_list
+    max_guesses = max_guesses or board_guesses(boards)
+
+    run_path = os.path.join(save_dir, simulation_run_name(strategy, first_guess, boards))
+    csv_path = f"{run_path}.csv"
+    progress_path = f"{csv_path}.progress"
+    run_key = _simulation_run_key(context, answers_to_simulate, strategy, max_guesses, first_guess, boards)
+
+    started = datetime.datetime.now()
+    start_ts = started.isoformat()
+    previous_elapsed = 0.0
+    done = set()
+    resumed = _resume_simulation(csv_path, progress_path, run_key) if resume else None
+    if resumed is not None:
+        done, progress = resumed
+        previous_elapsed = progress["elapsed_seconds"]
+        start_ts = progress["start_ts"]
+        print(f"Resuming simulation: {len(done)}/{len(answers_to_simulate)} answers already in '{csv_path}'")
+
+    if boards > 1:
+        pending = [ans for ans in multi_board_games(answers_to_simulate, boards) if "+".join(ans) not in done]
     else:
-        init_worker(words_path, feedback_matrix_path, word_to_index_path)
-        for ans in tqdm(answers_to_simulate, desc="Simulating", ncols=100):
-            results.append(simulate_one_answer_wrapper((ans, max_guesses, strategy, first_guess)))
-
-    per_answer_rows = []
-    rounds_counter = Counter()
-    solved_count = 0
-    attempts_list = []
-
-    for ans, guesses_taken, solved, history in results:
-            if solved:
-                rounds_counter[guesses_taken] += 1
-                solved_count += 1
-                attempts_list.append(guesses_taken)
-            else:
-                rounds_counter["fail"] += 1
-                attempts_list.append(max_guesses + 1)
-
-            per_answer_rows.append({
-                "answer": ans,
+        pending = [ans for ans in answers_to_simulate if ans not in done]
+
+    if not pending:
+        games = iter(())
+    elif boards > 1 and parallel:
+        games = simulate_boards_pool(context, pending, max_guesses, strategy, first_guess, workers)
+    elif boards > 1:
+        games = (
+            (game, ans, *simulate_multi_board(ans, context, max_guesses, strategy, first_guess))
+            for game, ans in enumerate(pending)
+        )
+    elif batched and parallel:
+        games = simulate_batch_parallel(context, pending, max_guesses, strategy, first_guess, workers)
+    elif batched:
+        games = simulate_batch(context, pending, max_guesses, strategy, first_guess)
+    elif parallel:
+        games = simulate_pool(context, pending, max_guesses, strategy, first_guess, workers)
+    else:
+        games = (
+            (game, ans, *simulate_one_answer(ans, context, max_guesses=max_guesses, strategy=strategy, first_guess=first_guess))
+            for game, ans in enumerate(pending)
+        )
+
+    with open(csv_path, "a" if resumed else "w", newline="", encoding="utf8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=SIMULATION_FIELDS)
+        if resumed is None:
+            writer.writeheader()
+
+        def checkpoint():
+            csvfile.flush()
+            os.fsync(csvfile.fileno())
+            elapsed = previous_elapsed + (datetime.datetime.now() - started).total_seconds()
+            _write_simulation_progress(progress_path, run_key, csvfile.tell(), elapsed, start_ts)
+
+        checkpoint()
+        for written, (_, ans, guesses_taken, solved, history) in enumerate(
+                tqdm(games, total=len(pending), desc="Simulating", ncols=100), 1):
+            writer.writerow({
+                "answer": "+".join(ans) if boards > 1 else ans,
                 "solved": bool(solved),
                 "guesses_taken": guesses_taken if guesses_taken is not None else -1,
-                "history": " | ".join([f"{g}:{fb}" for g, fb in history])
+                "history": " | ".join([f"{g}:{'+'.join(fb) if boards > 1 else fb}" for g, fb in history])
             })
+            if written % SIMULATION_CHECKPOINT_ROWS == 0:
+                checkpoint()
 
-    # compute statistics
-    wins = solved_count
-    fails = total_games - solved_count
-    mean_rounds = float(np.mean([a for a in attempts_list if a <= max_guesses])) if wins > 0 else float("nan")
-    median_rounds = float(np.median([a for a in attempts_list if a <= max_guesses])) if wins > 0 else float("nan")
-    overall_mean_including_fails = float(np.mean(attempts_list))  # treats fails as max_guesses+1
-
-
-    end_ts = datetime.datetime.now()
-    elapsed = (end_ts - start_ts).total_seconds()
-
-    summary = {
-        "elapsed_seconds": elapsed,
-        "strategy": strategy,
-        "first_guess": first_guess,
-        "total_games": total_games,
-        "wins": int(wins),
-        "fails": int(fails),
-        "win_rate": wins / total_games,
-        "mean_rounds_win_only": mean_rounds,
-        "median_rounds_win_only": median_rounds,
-        "mean_rounds_including_fails": overall_mean_including_fails,
-        "rounds_distribution": dict(rounds_counter),
-        "start_ts": start_ts.isoformat(),
-    }
-
-    csv_path = os.path.join(save_dir, f"simulation_{strategy}_{'withfirst' if first_guess else 'nofirst'}.csv")
-    with open(csv_path, "w", newline="", encoding="utf8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=["answer", "solved", "guesses_taken", "history"])
-        writer.writeheader()
-        writer.writerows(per_answer_rows)
-
-    np.savez(os.path.join(save_dir, f"summary_{strategy}.npz"), **summary)
+    elapsed = previous_elapsed + (datetime.datetime.now() - started).total_seconds()
+    columns = read_simulation_csv(csv_path, context, boards)
+    summary = summarize_simulation(columns, strategy, first_guess, max_guesses, elapsed, start_ts, boards)
+    save_simulation_run(f"{run_path}.npz", context, columns, summary)
+    os.remove(progress_path)
 
     print("\nSimulation complete.")
     print(f"Saved per-answer CSV to: {csv_path}")
@@ -461,60 +2510,163 @@ def simulate_all_answers(words, feedback_matrix, word_to_index,
 #endregion
 
 #region LoadData
-def load_summary(strategy):
-    path = os.path.join(SIMULATION_SAVE_DIR, f"summary_{strategy}.npz")
-    if not os.path.exists(path):
-        return None
+class SimulationRun:
+    """A finished simulation read from its columnar file (see read_simulation_csv for the columns)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        with np.load(path, allow_pickle=False) as data:
+            self.version = str(data["version"])
+            self.summary = json.loads(str(data["summary"]))
+            self.answers = data["answers"]
+            self.guesses_taken = data["guesses_taken"]
+            self.solved = data["solved"]
+            self.history_offsets = data["history_offsets"]
+            self.history_guesses = data["history_guesses"]
+            self.history_codes = data["history_codes"]
+
+        # JSON object keys are strings; guess counts go back to ints
+        self.distribution = {
+            int(k) if k.isdigit() else k: v for k, v in self.summary["rounds_distribution"].items()
+        }
+        self.summary["rounds_distribution"] = self.distribution
+
+    def history(self, game, context):
+        """
+        History of one game as (word, feedback string) pairs, or (word, [feedback
+        of each board]) for multi-board runs; needs the vocabulary the run was made with.
+        """
+        if context.version != self.version:
+            raise ValueError(f"Simulation '{self.name}' was run with a different vocabulary")
+        start, stop = self.history_offsets[game], self.history_offsets[game + 1]
+        history = []
+        for g_idx, code in zip(self.history_guesses[start:stop], self.history_codes[start:stop]):
+            length = len(context.word_list[g_idx])
+            if np.ndim(code):
+                history.append((context.word_list[g_idx], [decode_feedback(int(c), length) for c in code]))
+            else:
+                history.append((context.word_list[g_idx], decode_feedback(int(code), length)))
+        return history
 
-    data = np.load(path, allow_pickle=True)
-    summary = {key: data[key].item() if data[key].shape == () else data[key].tolist() for key in data.files}
-    return summary
 
+_simulation_runs = {}
 
-def load_distribution_from_csv(strategy, first_guess=False):
-    filename = f"simulation_{strategy}_{'withfirst' if first_guess else 'nofirst'}.csv"
-    path = os.path.join(SIMULATION_SAVE_DIR, filename)
-    if not os.path.exists(path):
+def load_simulation_run(name, save_dir=SIMULATION_SAVE_DIR):
+    """The run saved as '<save_dir>/<name>.npz', or None. Loaded once and reloaded only when the file changes."""
+    path = os.path.join(save_dir, f"{name}.npz")
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
         return None
 
-    rounds_count = {}
-    with open(path, newline="", encoding="utf8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row["solved"] == "True":
-                g = int(row["guesses_taken"])
-                rounds_count[g] = rounds_count.get(g, 0) + 1
-            else:
-                rounds_count["fail"] = rounds_count.get("fail", 0) + 1
+    cached = _simulation_runs.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, SimulationRun(path))
+        _simulation_runs[path] = cached
+    return cached[1]
+
+def list_simulation_runs(save_dir=SIMULATION_SAVE_DIR):
+    """Every finished run in save_dir, most recent first."""
+    if not os.path.isdir(save_dir):
+        return []
+    names = [f[:-4] for f in os.listdir(save_dir) if f.startswith("simulation_") and f.endswith(".npz")]
+    runs = [run for run in (load_simulation_run(name, save_dir) for name in names) if run is not None]
+    return sorted(runs, key=lambda run: run.summary["start_ts"], reverse=True)
+
+def convert_simulation_csv(csv_path, context, strategy, first_guess=None, max_guesses=6):
+    """Build the columnar file for a per-answer CSV written before runs were saved that way."""
+    columns = read_simulation_csv(csv_path, context)
+    start_ts = datetime.datetime.fromtimestamp(os.path.getmtime(csv_path)).isoformat()
+    summary = summarize_simulation(columns, strategy, first_guess, max_guesses, float("nan"), start_ts)
+    save_simulation_run(f"{os.path.splitext(csv_path)[0]}.npz", context, columns, summary)
+    return summary
+
+def load_simulation(strategy, first_guess=None):
+    """
+    Latest finished run of a strategy. first_guess=None takes whichever of the
+    with/without opener runs is more recent; True or False picks one.
+    """
+    if first_guess is None:
+        runs = [load_simulation_run(simulation_run_name(strategy, opener)) for opener in (False, True)]
+        runs = [run for run in runs if run is not None]
+        return max(runs, key=lambda run: run.summary["start_ts"], default=None)
+    return load_simulation_run(simulation_run_name(strategy, first_guess))
 
-    return rounds_count
+def load_summary(strategy):
+    run = load_simulation(strategy)
+    return run.summary if run is not None else None
+
+def load_distribution(strategy, first_guess=False):
+    run = load_simulation(strategy, first_guess)
+    return run.distribution if run is not None else None
 #endregion
 
 if __name__ == "__main__":
-
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build solver data and run simulations.")
+    parser.add_argument("--length", type=int, default=5, help="word length; other than 5 uses data/<length>_letters")
+    commands = parser.add_subparsers(dest="command")
+    simulate_parser = commands.add_parser("simulate", help="simulate every answer with the entropy strategy (default)")
+    simulate_parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    simulate_parser.add_argument("--boards", type=int, default=1, help="answers per game, e.g. 4 for Quordle")
+    simulate_parser.add_argument("--strategy", default="entropy",
+                                 help="entropy, min_expected or lookahead (two-turn), optionally prefixed with viable_")
+    book_parser = commands.add_parser("book", help="precompute the opening book")
+    book_parser.add_argument("--openers", help="comma separated openers (default: the best --count first guesses by entropy)")
+    book_parser.add_argument("--count", type=int, default=5)
+    book_parser.add_argument("--turns", type=int, choices=(2, 3), default=2)
+    book_parser.add_argument("--top-k", type=int, default=20)
+    index_parser = commands.add_parser("partition", help="precompute the per-guess feedback bucket index")
+    index_parser.add_argument("--top", type=int, help="only index the best TOP first guesses by entropy (default: all)")
+    commands.add_parser("warmup", help="compile the kernels into Numba's cache so new processes start fast")
+    args = parser.parse_args()
+
+    save_dir = data_dir_for_length(args.length)
     try:
-        words, feedback_matrix, word_to_index = load_feedback_data()
-    except FileNotFoundError:
-        print("No cached data found — building matrix...")
-        words = read_word_dataset(5)
-        feedback_matrix = build_feedback_matrix(words)
-        word_to_index = {w: i for i, w in enumerate(words)}
-        save_feedback_data(words, feedback_matrix)
-
-    test_answers = words
+        context = get_context(save_dir)
+    except (FileNotFoundError, ValueError):
+        words = read_word_dataset(args.length)
+        save_word_lists(words, save_dir)
+        if SCORING_MODE != "letters" and choose_scoring_mode(len(words), len(words), args.length) == "matrix":
+            print("No cached data found — building matrix...")
+            build_feedback_matrix_file(f"{save_dir}/{FEEDBACK_MATRIX_FILE}", words)
+        else:
+            print(f"No cached data found — saved {len(words)} words, too many for a feedback matrix so "
+                  f"feedback is computed on the fly")
+        context = get_context(save_dir)
+
+    if args.command == "warmup":
+        warm_up(save_dir)
+        sys.exit(0)
+
+    if args.command == "partition":
+        guesses = None
+        if args.top:
+            first_turn = best_guesses_for_state(GameState(context))
+            guesses = [context.word_list[i] for i in first_turn.ranked("entropy", args.top)]
+        build_partition_index(context, guesses)
+        sys.exit(0)
+
+    if args.command == "book":
+        if args.openers:
+            openers = [w.strip().lower() for w in args.openers.split(",")]
+        else:
+            first_turn = best_guesses_for_state(GameState(context))
+            openers = [context.word_list[i] for i in first_turn.ranked("entropy", args.count)]
+        build_opening_book(context, openers, turns=args.turns, top_k=args.top_k)
+        sys.exit(0)
+
+    test_answers = context.answer_list
     import multiprocessing
     multiprocessing.set_start_method("spawn", force=True)
-    summary = simulate_all_answers(words, feedback_matrix, word_to_index,
-                                   strategy="entropy",
-                                   max_guesses=6,
+    summary = simulate_all_answers(context,
+                                   strategy=getattr(args, "strategy", "entropy"),
+                                   max_guesses=None,
                                    answers_to_simulate=test_answers,
                                    first_guess=None,
-                                   save_dir=SIMULATION_SAVE_DIR)
-
-    # with cProfile.Profile() as pr:
-    #     results = next_best_guesses(words, feedback_matrix, word_to_index, [])
-
-    # print(f":")
-    # stats = pstats.Stats(pr)
-    # stats.sort_stats(pstats.SortKey.TIME).print_stats(20)
-
+                                   save_dir=SIMULATION_SAVE_DIR if args.length == 5 else
+                                   f"{SIMULATION_SAVE_DIR}/{args.length}_letters",
+                                   workers=getattr(args, "workers", None),
+                                   boards=getattr(args, "boards", 1))
@@ -1,12 +1,14 @@
 document.addEventListener("DOMContentLoaded", () => {
     const params = new URLSearchParams(window.location.search);
-    const guess = params.get("guess");
+    // ?guess=crane or ?guess=crane,slate to compare several guesses
+    const guesses = (params.get("guess") || "").split(",").map(g => g.trim()).filter(Boolean);
     const history = JSON.parse(params.get("history") || "[]");
 
-    document.getElementById("guess-title").textContent = `Distribution for "${guess}"`;
+    document.getElementById("guess-title").textContent =
+        `Distribution for ${guesses.map(g => `"${g}"`).join(", ")}`;
 
     renderHistoryGrid(history);
-    fetchDistribution(guess, history);
+    fetchDistribution(guesses, history);
     setupSidebar();
 });
 
@@ -37,27 +39,25 @@ function renderHistoryGrid(history) {
     });
 }
 
-function fetchDistribution(guess, history) {
+function fetchDistribution(guesses, history) {
     fetch("/distribution_data", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ guess, history })
+        body: JSON.stringify({ guesses, history })
     })
         .then(res => res.json())
-        .then(data => renderChart(data));
+        .then(data => renderChart(data.guesses || []));
 }
 
+const DATASET_COLORS = ["#6aaa64", "#c9b458", "#787c7e", "#85c0f9", "#f5793a"];
 
-function renderChart(data) {
-    const ctx = document.getElementById("distributionChart").getContext("2d");
 
-    // Extract and sort distribution data by remaining word count (numeric)
-    const entries = Object.entries(data.distribution)
-        .map(([remaining, count]) => [Number(remaining), count])
-        .sort((a, b) => a[0] - b[0]);
+function renderChart(results) {
+    const ctx = document.getElementById("distributionChart").getContext("2d");
 
-    const labels = entries.map(([remaining]) => remaining);
-    const values = entries.map(([_, count]) => count);
+    // Union of the remaining word counts of every guess, sorted numerically
+    const labels = [...new Set(results.flatMap(r => Object.keys(r.distribution || {}).map(Number)))]
+        .sort((a, b) => a - b);
 
     // Clear any previous chart before drawing a new one
     if (window.currentChart) {
@@ -68,11 +68,11 @@ function renderChart(data) {
         type: 'bar',
         data: {
             labels,
-            datasets: [{
-                label: "Possible Answers → Remaining Word Count",
-                data: values,
-                backgroundColor: "#6aaa64" 
-            }]
+            datasets: results.map((r, i) => ({
+                label: `${r.guess}: entropy ${(r.entropy || 0).toFixed(2)}, worst case ${r.worst_case || 0}`,
+                data: labels.map(remaining => (r.distribution || {})[remaining] || 0),
+                backgroundColor: DATASET_COLORS[i % DATASET_COLORS.length]
+            }))
         },
         options: {
             scales: {
@@ -87,12 +87,13 @@ function renderChart(data) {
             plugins: {
                 title: {
                     display: true,
-                    text: `Expected Remaining: ${data.expected_remaining.toFixed(2)}`
+                    text: "Expected Remaining: " +
+                        results.map(r => `${r.guess} ${r.expected_remaining.toFixed(2)}`).join(", ")
                 },
                 tooltip: {
                     callbacks: {
                         label: (context) =>
-                            `${context.parsed.y} answers leave ${context.parsed.x} remaining`
+                            `${context.dataset.label.split(":")[0]}: ${context.parsed.y} answers leave ${context.label} remaining`
                     }
                 }
             }
@@ -9,6 +9,8 @@ let gameMode = 'auto';
 let manualClickCount = [];
 let letterFeedbackMap = {};
 let fullOptionsData = { answers: [], guesses: [] };
+let fullOptionsRequest = 0;
+const FULL_OPTIONS_PAGE_SIZE = 500;
 
 
 // Initialize game
@@ -241,7 +243,8 @@ function updateBestOptions() {
     // Clear all lists
     Object.values(sections).forEach(el => { if (el) el.innerHTML = ''; });
 
-    fetch('/best_options?' + new URLSearchParams({ history: JSON.stringify(sessionHistoryArray) }))
+    // The server keeps the game's position, so the history is not resent
+    fetch('/best_options')
         .then(res => res.json())
         .then(data => {
             sections.totalRemaining.textContent = `Remaining words: ${data.total_remaining}`;
@@ -364,18 +367,41 @@ function loadFullOptions() {
         return;
     }
     document.getElementById('options-panel').style.display = 'none';
+    document.getElementById('full-viable-answers').innerHTML = '';
+    document.getElementById('full-viable-guesses').innerHTML = '';
     toggleLoadingOptions();
 
-    fetch('/full_options?' + new URLSearchParams({ history: JSON.stringify(sessionHistoryArray) }))
+    fullOptionsRequest++;
+    fetchFullOptionsPage(0, fullOptionsRequest);
+}
+
+// Pages are appended as they arrive, so the first results show up immediately
+function fetchFullOptionsPage(offset, requestId) {
+    const params = new URLSearchParams({
+        offset,
+        limit: FULL_OPTIONS_PAGE_SIZE
+    });
+
+    fetch('/full_options?' + params)
         .then(res => res.json())
         .then(data => {
-            fullOptionsData.answers = data.viable_answers.map((item, idx) => ({ ...item, index: idx }));
-            fullOptionsData.guesses = data.viable_guesses.map((item, idx) => ({ ...item, index: idx }));
+            if (requestId !== fullOptionsRequest) return;
 
-            displayFullOptions(fullOptionsData);
+            const page = { answers: data.viable_answers, guesses: data.viable_guesses };
+            fullOptionsData.answers.push(...page.answers);
+            fullOptionsData.guesses.push(...page.guesses);
 
-            document.getElementById('full-options-panel').style.display = 'block';
-            toggleLoadingOptions();
+            if (offset === 0) {
+                document.getElementById('full-options-panel').style.display = 'block';
+                toggleLoadingOptions();
+            }
+            displayFullOptions(page);
+            filterFullOptions();
+
+            const nextOffset = offset + FULL_OPTIONS_PAGE_SIZE;
+            if (nextOffset < Math.max(data.total_answers, data.total_guesses)) {
+                fetchFullOptionsPage(nextOffset, requestId);
+            }
         });
 }
 
@@ -383,9 +409,6 @@ function displayFullOptions(data) {
     const ulAnswers = document.getElementById('full-viable-answers');
     const ulGuesses = document.getElementById('full-viable-guesses');
 
-    ulAnswers.innerHTML = '';
-    ulGuesses.innerHTML = '';
-
     data.answers.forEach(item => {
         const li = document.createElement('li');
         li.textContent = `${item.index + 1}. ${item.word.toUpperCase()} | Entropy: ${item.entropy.toFixed(2)}, Expected: ${item.expected.toFixed(1)}`;
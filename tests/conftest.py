@@ -0,0 +1,49 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# A small vocabulary sampled from data/words.txt in a data directory of its own.
+# WORDLE_DATA_DIR has to be set before solver (or main) is first imported.
+DATA_DIR = tempfile.mkdtemp(prefix="wordle-tests-")
+os.environ["WORDLE_DATA_DIR"] = DATA_DIR
+os.environ["WORDLE_SCORING"] = "matrix"
+
+import solver
+
+WORDS = solver.read_word_list(os.path.join(ROOT, "data", "words.txt"))[::40]
+ANSWERS = WORDS[::2]  # fewer than LOOKAHEAD_EXACT_MAX_REMAINING, so lookahead is exact from the start
+
+solver.save_word_lists(WORDS, DATA_DIR, ANSWERS)
+solver.build_feedback_matrix_file(os.path.join(DATA_DIR, solver.FEEDBACK_MATRIX_FILE), WORDS, ANSWERS)
+
+
+def pytest_sessionfinish(session):
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+
+def feedback(guess, answer):
+    return solver.decode_feedback(solver.get_feedback_code(guess, answer), len(guess))
+
+
+@pytest.fixture(scope="session")
+def context():
+    """The process-wide matrix context, warmed up on the main thread."""
+    solver.warm_up(DATA_DIR)
+    return solver.get_context(DATA_DIR)
+
+
+@pytest.fixture(scope="session")
+def letters_context(context):
+    return solver.SolverContext.load(DATA_DIR, mode="letters")
+
+
+@pytest.fixture
+def client(context):
+    import main
+    return main.app.test_client()
@@ -0,0 +1,60 @@
+import json
+
+import solver
+from conftest import feedback
+
+
+def test_analyze_histories_rows(context):
+    answer, guesses = context.answer_list[3], context.word_list[:2]
+    good = [(g, feedback(g, answer)) for g in guesses]
+    not_an_answer = next(w for w in context.word_list if w not in context.answer_to_index)
+    histories = [
+        good,
+        [("zzzzz", "BBBBB")],
+        [(guesses[0], "BBB")],
+        None,
+        [(not_an_answer, "GGGGG"), (guesses[0], "BBBBB")],
+    ]
+
+    rows = list(solver.analyze_histories(histories, context, batch_size=2))
+
+    assert [row["game"] for row in rows] == list(range(len(histories)))
+    assert "error" not in rows[0]
+    assert [turn["guess"] for turn in rows[0]["turns"]] == guesses
+    assert rows[0]["turns"][-1]["remaining_after"] == len(solver.GameState.from_history(context, good))
+    assert rows[1]["error"] == "'zzzzz' is not a valid guess"
+    assert rows[2]["error"] == f"invalid feedback 'BBB' for '{guesses[0]}'"
+    assert rows[3]["error"] == "invalid history"
+    assert len(rows[4]["turns"]) == 1
+    assert rows[4]["error"] == "no answer is left after turn 1"
+
+
+def test_analyze_histories_reports_positions_that_could_not_be_scored(context):
+    guess = context.word_list[0]
+    histories = [[(guess, feedback(guess, answer))] for answer in context.answer_list[:2]] + [[("zzzzz", "BBBBB")]]
+
+    rows = list(solver.analyze_histories(histories, context, score=lambda state: None))
+
+    assert [row["error"] for row in rows] == ["position could not be scored"] * 2 + ["'zzzzz' is not a valid guess"]
+
+
+def test_analyze_gives_up_on_a_busy_executor(client, context, monkeypatch):
+    import main
+    monkeypatch.setattr(main, "ANALYZE_MAX_WAIT", 0.1)
+    monkeypatch.setattr(main.solver_executor, "max_pending", 0)
+    # the opening position is answered from the first-turn cache; the one after it has to be scored
+    answer = context.answer_list[4]
+    history = [{"guess": g, "feedback": feedback(g, answer)} for g in context.word_list[-3:-1]]
+    body = "\n".join([
+        json.dumps({"id": "a", "history": history}),
+        "not json",
+    ])
+
+    response = client.post("/analyze", data=body)
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert response.status_code == 200
+    assert rows == [
+        {"id": "a", "game": 0, "error": "position could not be scored"},
+        {"game": 1, "error": "invalid history"},
+    ]
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import solver
+
+WORDS = ["speed", "abbey", "eerie", "lolly", "crane", "geese", "level", "belle", "allee", "steep", "creep", "eeeee"]
+ANSWERS = ["speed", "abbey", "eerie", "lolly", "erase", "sleep", "llama"]
+
+
+def expected_matrix(words, answers):
+    return np.array([[solver.get_feedback_code(g, a) for a in answers] for g in words])
+
+
+@pytest.mark.parametrize("answers", [None, ANSWERS])
+def test_build_feedback_matrix_matches_get_feedback_code(answers):
+    matrix = solver.build_feedback_matrix(WORDS, answers, block_rows=5)
+    np.testing.assert_array_equal(matrix, expected_matrix(WORDS, answers or WORDS))
+
+
+def test_build_feedback_matrix_file_matches_get_feedback_code(tmp_path):
+    path = str(tmp_path / solver.FEEDBACK_MATRIX_FILE)
+    solver.build_feedback_matrix_file(path, WORDS, ANSWERS, block_rows=5)
+    assert not os.path.exists(f"{path}.progress")
+    np.testing.assert_array_equal(solver.load_feedback_matrix(path, WORDS, ANSWERS), expected_matrix(WORDS, ANSWERS))
+
+
+def test_build_feedback_matrix_file_resumes(tmp_path, monkeypatch):
+    path = str(tmp_path / solver.FEEDBACK_MATRIX_FILE)
+
+    def interrupt(done, n):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(solver, "_print_build_progress", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        solver.build_feedback_matrix_file(path, WORDS, ANSWERS, block_rows=5)
+    with open(f"{path}.progress") as f:
+        assert f.read() == "5"
+    monkeypatch.undo()
+
+    solver.build_feedback_matrix_file(path, WORDS, ANSWERS, block_rows=5)
+    assert not os.path.exists(f"{path}.progress")
+    np.testing.assert_array_equal(solver.load_feedback_matrix(path, WORDS, ANSWERS), expected_matrix(WORDS, ANSWERS))
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+import solver
+from conftest import feedback
+
+
+def brute_force(context, remaining, g_idx, one_step_entropy):
+    """Two-turn entropy and expected remaining of a guess, trying every follow-up on every bucket."""
+    codes = context.feedback_codes(g_idx, remaining)
+    entropy, expected = one_step_entropy, 0.0
+    for code in np.unique(codes):
+        bucket = remaining[codes == code]
+        p = len(bucket) / len(remaining)
+        if len(bucket) < 2:
+            expected += p
+            continue
+        best = (-1.0, 0.0)
+        for followup in range(len(context.word_list)):
+            counts = np.bincount(context.feedback_codes(followup, bucket))
+            q = counts[counts > 0] / len(bucket)
+            H = float(np.sum(q * np.log2(1.0 / q)))
+            if H > best[0] + 1e-12:
+                best = (H, float(np.sum(q * counts[counts > 0])))
+        entropy += p * best[0]
+        expected += p * best[1]
+    return entropy, expected
+
+
+@pytest.mark.parametrize("turns", [0, 1])
+def test_exact_lookahead_matches_brute_force(context, turns):
+    state = solver.GameState(context)
+    if turns:
+        # the least informative opener leaves a position big enough to have many buckets
+        guess = context.word_list[int(np.nanargmin(solver.best_guesses_for_state(state).entropies))]
+        state = solver.GameState.from_history(context, [(guess, feedback(guess, context.answer_list[0]))])
+    assert 20 <= len(state) <= solver.LOOKAHEAD_EXACT_MAX_REMAINING
+    scores = solver.best_guesses_for_state(state)
+
+    lookahead = solver.lookahead_scores(scores, k=5)
+    assert lookahead.mode == "exact" and lookahead.complete
+    assert len(lookahead.candidates) == 5
+
+    for i, g_idx in enumerate(lookahead.candidates):
+        entropy, expected = brute_force(context, state.remaining, g_idx, scores.entropies[g_idx])
+        assert lookahead.entropies[i] == pytest.approx(entropy, rel=1e-9)
+        assert lookahead.expected_remaining[i] == pytest.approx(expected, rel=1e-9)
@@ -0,0 +1,51 @@
+import pytest
+
+import solver
+from conftest import WORDS, feedback
+
+GUESS = WORDS[30]
+
+
+def multi_history(context, guesses, answers):
+    return [{"guess": g, "feedback": [feedback(g, a) for a in answers]} for g in guesses]
+
+
+def test_multi_best_options(client, context):
+    answers = context.answer_list[20:22]
+    guesses = [GUESS, context.word_list[31]]
+
+    response = client.post("/multi_best_options?k=3", json={"history": multi_history(context, guesses, answers)})
+    assert response.status_code == 200
+    data = response.get_json()
+
+    expected = [len(solver.GameState.from_history(context, [(g, feedback(g, a)) for g in guesses])) for a in answers]
+    assert [board["remaining"] for board in data["boards"]] == expected
+    assert len(data["top"]) == 3
+    assert data["best_guess"] in context.word_to_index
+
+
+def test_multi_best_options_ignores_a_bad_k(client, context):
+    history = multi_history(context, [GUESS], context.answer_list[20:24])
+
+    response = client.post("/multi_best_options?k=abc", json={"history": history})
+    assert response.status_code == 200
+    assert len(response.get_json()["top"]) == 10
+
+
+@pytest.mark.parametrize("body", [
+    {"history": [{"guess": 12345, "feedback": ["BBBBB", "BBBBB"]}]},
+    {"history": [{"guess": "zzzzzz", "feedback": ["BBBBB", "BBBBB"]}]},
+    {"history": [{"guess": GUESS, "feedback": [[1, 2, 3, 4, 5], "BBBBB"]}]},
+    {"history": [{"guess": GUESS, "feedback": []}]},
+    {"history": [{"guess": GUESS, "feedback": "BBBBB"}]},
+    {"history": [{"guess": GUESS, "feedback": ["BBBB", "BBBBB"]}]},
+    {"history": ["crane"]},
+    {"history": "crane"},
+    {"boards": 0},
+    {"boards": True},
+    {"boards": 2, "history": [{"guess": GUESS, "feedback": ["BBBBB", "BBBBB", "BBBBB"]}]},
+])
+def test_multi_best_options_rejects_bad_input(client, body):
+    response = client.post("/multi_best_options", json=body)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
@@ -0,0 +1,35 @@
+import os
+
+import numpy as np
+
+import solver
+
+
+def test_buckets_match_a_row_scan(context, tmp_path):
+    index = solver.build_partition_index(context, path=str(tmp_path / "index"), block_rows=64)
+
+    for g_idx in range(0, len(context.word_list), 5):
+        codes = context.feedback_codes(g_idx)
+        for code in np.unique(codes):
+            np.testing.assert_array_equal(index.bucket(g_idx, code), np.flatnonzero(codes == code))
+        assert len(index.bucket(g_idx, context.n_patterns - 1)) == np.count_nonzero(codes == context.n_patterns - 1)
+
+    guesses = np.arange(0, len(context.word_list), 3)
+    expected = np.stack([np.bincount(context.feedback_codes(g), minlength=context.n_patterns) for g in guesses])
+    np.testing.assert_array_equal(index.bucket_sizes(guesses), expected)
+
+
+def test_rebuild_replaces_the_whole_index(context, tmp_path):
+    path = str(tmp_path / "index")
+    solver.build_partition_index(context, path=path)
+    with open(f"{path}/stale.npy", "w") as f:
+        f.write("left over")
+
+    guesses = context.word_list[:3]
+    index = solver.build_partition_index(context, guesses=guesses, path=path)
+
+    assert sorted(os.listdir(tmp_path)) == ["index"]
+    assert not os.path.exists(f"{path}/stale.npy")
+    assert [w for w in context.word_list if context.word_to_index[w] in index] == guesses
+    np.testing.assert_array_equal(index.bucket(0, context.feedback_codes(0)[4]),
+                                  np.flatnonzero(context.feedback_codes(0) == context.feedback_codes(0)[4]))
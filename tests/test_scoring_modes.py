@@ -0,0 +1,44 @@
+import numpy as np
+
+import solver
+from conftest import feedback
+
+
+def test_modes_share_a_version(context, letters_context):
+    assert context.scoring_mode == "matrix"
+    assert letters_context.scoring_mode == "letters"
+    assert letters_context.version == context.version
+
+
+def test_feedback_codes_match(context, letters_context):
+    answers = np.arange(0, len(context.answer_list), 3, dtype=np.int32)
+    guesses = np.arange(40, dtype=np.int32)
+
+    np.testing.assert_array_equal(letters_context.feedback_codes(guesses), context.feedback_codes(guesses))
+    np.testing.assert_array_equal(letters_context.feedback_codes(guesses, answers),
+                                  context.feedback_codes(guesses, answers))
+    np.testing.assert_array_equal(letters_context.feedback_codes(7, answers), context.feedback_codes(7, answers))
+    np.testing.assert_array_equal(letters_context.feedback_codes(7), context.feedback_codes(7))
+
+
+def test_metrics_scores_and_distributions_match(context, letters_context):
+    everything = np.arange(len(context.answer_list), dtype=np.int32)
+    for expected, actual in zip(solver.compute_metrics(context, everything),
+                                solver.compute_metrics(letters_context, everything)):
+        np.testing.assert_allclose(actual, expected, rtol=1e-12)
+
+    guess, answer = context.word_list[5], context.answer_list[10]
+    history = [(guess, feedback(guess, answer))]
+    matrix_state = solver.GameState.from_history(context, history)
+    letters_state = solver.GameState.from_history(letters_context, history)
+    np.testing.assert_array_equal(letters_state.remaining, matrix_state.remaining)
+
+    matrix_scores = solver.best_guesses_for_state(matrix_state)
+    letters_scores = solver.best_guesses_for_state(letters_state)
+    np.testing.assert_allclose(letters_scores.entropies, matrix_scores.entropies, rtol=1e-12)
+    np.testing.assert_allclose(letters_scores.expected_remaining, matrix_scores.expected_remaining, rtol=1e-12)
+    np.testing.assert_array_equal(letters_scores.ranked("entropy", 10), matrix_scores.ranked("entropy", 10))
+
+    guesses = np.arange(0, len(context.word_list), 7)
+    np.testing.assert_array_equal(solver.guess_distributions(letters_state, guesses),
+                                  solver.guess_distributions(matrix_state, guesses))
@@ -0,0 +1,88 @@
+import json
+import threading
+from concurrent.futures import Future
+
+import serving
+import solver
+from conftest import feedback
+from serving import SolverExecutor
+
+
+class InstantPool:
+    """Runs each job inside submit(), so its future is already done when submit() returns."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+def run_with_timeout(fn, *args, timeout=60):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(fn(*args)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), f"{fn.__name__} did not return"
+    return results[0]
+
+
+def uncached_state(context, answer_index=0):
+    answer = context.answer_list[answer_index]
+    guess = context.word_list[-1]
+    state = solver.GameState.from_history(context, [(guess, feedback(guess, answer))])
+    assert context.score_cache.key(state.remaining) not in context.score_cache
+    return state
+
+
+def test_scores_returns_when_the_job_finishes_before_the_callback_is_added(context):
+    executor = SolverExecutor()
+    executor._pool = InstantPool()
+    state = uncached_state(context, 1)
+
+    scores = run_with_timeout(executor.scores, state)
+    assert scores is not None
+    assert executor.pending() == 0
+
+
+def test_concurrent_submits_of_one_key_share_one_run(monkeypatch):
+    outcomes = []
+    monkeypatch.setattr(serving.metrics, "inc", lambda name, **labels: outcomes.append(labels["outcome"]))
+    executor = SolverExecutor()
+    release = threading.Event()
+    calls = []
+
+    def job():
+        calls.append(1)
+        release.wait(60)
+        return len(calls)
+
+    first = threading.Thread(target=lambda: outcomes.append(executor.submit("key", job)), daemon=True)
+    second = threading.Thread(target=lambda: outcomes.append(executor.submit("key", job)), daemon=True)
+    first.start()
+    while executor.pending() == 0:
+        threading.Event().wait(0.01)
+    second.start()
+    while "coalesced" not in outcomes:
+        threading.Event().wait(0.01)
+    release.set()
+    first.join(60)
+    second.join(60)
+
+    assert calls == [1]
+    assert sorted(outcomes, key=str) == [1, 1, "coalesced", "queued"]
+    assert executor.pending() == 0
+    executor.shutdown()
+
+
+def test_full_executor_answers_503(client, context, monkeypatch):
+    import main
+    monkeypatch.setattr(main.solver_executor, "max_pending", 0)
+    guess, answer = context.word_list[-1], context.answer_list[2]
+    history = [{"guess": guess, "feedback": feedback(guess, answer)}]
+
+    response = client.get("/best_options", query_string={"history": json.dumps(history)})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"